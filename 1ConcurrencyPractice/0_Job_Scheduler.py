@@ -1,22 +1,36 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Set, List, Callable
+import hashlib
+import heapq
+import json
+import os
+import pickle
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from contextlib import ExitStack
+from typing import Set, List, Callable, Dict, Iterable, Optional, Tuple
 
 # Dummy Job type: here, a callable with no args returning None
 Job = Callable[[], None]
 
-def job_scheduler(get_next_jobs, max_workers=8):
+def job_scheduler(get_next_jobs, max_workers=8, executor_cls=ThreadPoolExecutor):
     """
     Runs jobs as soon as their dependencies are met, concurrently.
 
     Args:
         get_next_jobs: function(finished_jobs: set) -> list of jobs ready to run
         max_workers: max concurrency level
+        executor_cls: ThreadPoolExecutor, or ProcessPoolExecutor for CPU-bound (picklable) jobs
     """
 
     finished_jobs = set()
     all_jobs_done = False
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with executor_cls(max_workers=max_workers) as executor:
         while not all_jobs_done:
             ready_jobs = get_next_jobs(finished_jobs)
             if not ready_jobs:
@@ -40,6 +54,388 @@ def job_scheduler(get_next_jobs, max_workers=8):
         print("All jobs completed.")
 
 
+class CheckpointStore:
+    """
+    Persists completed jobs in a local SQLite file so a restarted DAG can resume.
+
+    Each row keeps the hash of the job's inputs (its name, its cache key and the output
+    hashes of its dependencies) and its pickled output with a content hash. A job whose
+    input hash matches its row is served from here instead of being run again.
+    It also keeps the last measured duration of every job, so the critical-path priority
+    of a new scheduler process starts from the costs learned by earlier runs.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " name TEXT PRIMARY KEY, input_hash TEXT, output_hash TEXT, output BLOB)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS durations (name TEXT PRIMARY KEY, seconds REAL)")
+        self.conn.commit()
+
+    def load(self, name: str, input_hash: str):
+        """Returns (output, output_hash) if the job finished before with the same inputs."""
+        row = self.conn.execute(
+            "SELECT output, output_hash FROM jobs WHERE name = ? AND input_hash = ?",
+            (name, input_hash),
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def save(self, name: str, input_hash: str, output) -> str:
+        blob = pickle.dumps(output)
+        output_hash = hashlib.sha256(blob).hexdigest()
+        # Committed per job so a crash loses at most the jobs that were still running
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)",
+                (name, input_hash, output_hash, blob),
+            )
+        return output_hash
+
+    def load_durations(self) -> Dict[str, float]:
+        return dict(self.conn.execute("SELECT name, seconds FROM durations"))
+
+    def save_duration(self, name: str, seconds: float):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO durations VALUES (?, ?)", (name, seconds))
+
+    def close(self):
+        self.conn.close()
+
+
+def _timed_call(job):
+    """
+    Runs a job and returns (result, start, end, worker) measured where the job actually ran.
+    worker is (pid, thread id) so that thread and process pool workers can be told apart.
+    """
+    # perf_counter is CLOCK_MONOTONIC on Linux, so timestamps from pool processes line up
+    start = time.perf_counter()
+    result = job()
+    return result, start, time.perf_counter(), (os.getpid(), threading.get_ident())
+
+
+class DagScheduler:
+    """
+    Declarative DAG mode: jobs and their dependency edges are registered up front.
+
+    Instead of polling get_next_jobs() and waiting for a whole wave, every job keeps an
+    in-degree counter (number of unfinished dependencies). When a job completes, the
+    counters of its successors are decremented and any successor that reaches zero is
+    submitted immediately, so one slow job never idles workers whose work is unblocked.
+
+    When more jobs are ready than there are workers, ready jobs are dispatched in order
+    of their upward rank (cost of the job plus the longest remaining path to a sink),
+    i.e. critical-path first, as in HEFT list scheduling. Costs come from add_job(cost=...),
+    fall back to the durations observed in the previous run, and default to 1. Observed
+    durations live on the scheduler instance, and with a CheckpointStore also in the store,
+    so they carry over to schedulers in later processes.
+
+    The executor backend is pluggable: "thread", "process" (jobs must be picklable), or
+    "hybrid", where jobs tagged kind="io" go to a thread pool of io_workers and jobs tagged
+    kind="cpu" go to a process pool of max_workers. Results and finished state are always
+    tracked here, in the scheduling thread.
+
+    With a CheckpointStore, finished jobs and their outputs survive a crash: on the next
+    run, jobs whose inputs hash unchanged are completed from the store without running.
+    Pass add_job(key=...) (e.g. a version or parameter string) to invalidate a job whose
+    code or configuration changed.
+
+    Every run records per-job ready, submit, start and finish times and the worker that ran
+    the job (see metrics, summary() and export_chrome_trace()). Comparing the measured
+    critical path with the makespan tells whether a DAG is dependency-bound or worker-bound.
+    """
+
+    BACKENDS = ("thread", "process", "hybrid")
+
+    def __init__(self, max_workers=8, priority=True, executor="thread", io_workers=None,
+                 checkpoint: Optional[CheckpointStore] = None):
+        if executor not in self.BACKENDS:
+            raise ValueError(f"Unknown executor backend {executor}, expected one of {self.BACKENDS}")
+        self.max_workers = max_workers
+        self.priority = priority
+        self.executor = executor
+        self.io_workers = io_workers or max_workers
+        self.checkpoint = checkpoint
+        self.jobs: Dict[str, Job] = {}
+        # Maps job name -> names of the jobs it depends on
+        self.deps: Dict[str, Set[str]] = {}
+        self.costs: Dict[str, float] = {}
+        # "io" or "cpu"; only used to pick the pool in hybrid mode
+        self.kinds: Dict[str, str] = {}
+        # Extra input fingerprint per job for checkpoint invalidation
+        self.keys: Dict[str, str] = {}
+        # Durations measured by previous runs, used when no cost was given
+        self.observed_costs: Dict[str, float] = checkpoint.load_durations() if checkpoint else {}
+        self.finished_jobs: Set[str] = set()
+        self.failed_jobs: Dict[str, Exception] = {}
+        self.results: Dict[str, object] = {}
+        # Jobs completed from the checkpoint store during the last run
+        self.cached_jobs: Set[str] = set()
+        # Filled by run(): upward ranks, (name, start, end) per job and the makespan
+        self.ranks: Dict[str, float] = {}
+        self.schedule: List[Tuple[str, float, float]] = []
+        self.makespan = 0.0
+        # Per-job timings in seconds since the run started, plus the worker that ran it
+        self.metrics: Dict[str, Dict[str, object]] = {}
+        self.worker_slots = 0
+
+    def add_job(self, name: str, job: Job, deps: Iterable[str] = (), cost: Optional[float] = None,
+                kind: str = "io", key: str = ""):
+        if name in self.jobs:
+            raise ValueError(f"Job {name} already registered")
+        if kind not in ("io", "cpu"):
+            raise ValueError(f"Job {name} has unknown kind {kind}, expected 'io' or 'cpu'")
+        self.jobs[name] = job
+        self.deps[name] = set(deps)
+        self.kinds[name] = kind
+        self.keys[name] = key
+        if cost is not None:
+            self.costs[name] = cost
+
+    def estimated_cost(self, name: str) -> float:
+        if name in self.costs:
+            return self.costs[name]
+        return self.observed_costs.get(name, 1.0)
+
+    def _successors(self) -> Dict[str, List[str]]:
+        successors = {name: [] for name in self.jobs}
+        for name, deps in self.deps.items():
+            for dep in deps:
+                if dep not in self.jobs:
+                    raise ValueError(f"Job {name} depends on unknown job {dep}")
+                successors[dep].append(name)
+        return successors
+
+    def _topological_order(self, successors) -> List[str]:
+        in_degree = {name: len(deps) for name, deps in self.deps.items()}
+        order = [name for name, degree in in_degree.items() if degree == 0]
+        for name in order:  # order grows while we iterate over it
+            for succ in successors[name]:
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    order.append(succ)
+        if len(order) != len(self.jobs):
+            raise ValueError("Dependency graph contains a cycle")
+        return order
+
+    def compute_ranks(self) -> Dict[str, float]:
+        """Upward rank: estimated cost of the job plus the costliest path to any sink."""
+        successors = self._successors()
+        ranks = {}
+        for name in reversed(self._topological_order(successors)):
+            tail = max((ranks[succ] for succ in successors[name]), default=0.0)
+            ranks[name] = self.estimated_cost(name) + tail
+        self.ranks = ranks
+        return ranks
+
+    def lower_bound(self) -> float:
+        """No schedule can beat the critical path nor any pool's work spread over its workers."""
+        ranks = self.compute_ranks()
+        critical_path = max(ranks.values(), default=0.0)
+        sizes, routes = self._pool_sizes()
+        work = {pool: 0.0 for pool in sizes}
+        for name in self.jobs:
+            work[routes[self.kinds[name]]] += self.estimated_cost(name)
+        return max(critical_path, max(work[pool] / sizes[pool] for pool in sizes))
+
+    def _pool_sizes(self):
+        """Returns {pool name: worker limit} and the pool each job kind routes to."""
+        if self.executor == "thread":
+            return {"thread": self.max_workers}, {"io": "thread", "cpu": "thread"}
+        if self.executor == "process":
+            return {"process": self.max_workers}, {"io": "process", "cpu": "process"}
+        return {"thread": self.io_workers, "process": self.max_workers}, {"io": "thread", "cpu": "process"}
+
+    def _open_pools(self, stack: ExitStack):
+        """Returns {pool name: (executor, worker limit)} and the pool each job kind routes to."""
+        sizes, routes = self._pool_sizes()
+        executors = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+        pools = {pool: (stack.enter_context(executors[pool](size)), size) for pool, size in sizes.items()}
+        return pools, routes
+
+    def _input_hash(self, name: str, output_hashes: Dict[str, str]) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{name}\0{self.keys[name]}".encode())
+        for dep in sorted(self.deps[name]):
+            digest.update(f"\0{dep}={output_hashes[dep]}".encode())
+        return digest.hexdigest()
+
+    def run(self):
+        successors = self._successors()
+        ranks = self.compute_ranks()
+        in_degree = {name: len(deps) for name, deps in self.deps.items()}
+        self.finished_jobs = set()
+        self.failed_jobs = {}
+        self.results = {}
+        self.cached_jobs = set()
+        self.schedule = []
+        self.metrics = {}
+        input_hashes: Dict[str, str] = {}
+        output_hashes: Dict[str, str] = {}
+
+        with ExitStack() as stack:
+            pools, routes = self._open_pools(stack)
+            self.worker_slots = sum(limit for _, limit in pools.values())
+            run_start = time.perf_counter()
+
+            # Ready jobs wait here (one heap per pool) instead of in the executor's FIFO
+            # queue so that the highest-ranked one is picked each time a worker frees up.
+            ready = {pool: [] for pool in pools}
+            in_flight = {pool: 0 for pool in pools}
+            sequence = 0
+            # Jobs whose dependencies just finished, not yet checked against the checkpoint
+            unblocked = deque(name for name, degree in in_degree.items() if degree == 0)
+
+            def complete(name, result):
+                self.finished_jobs.add(name)
+                self.results[name] = result
+                for succ in successors[name]:
+                    in_degree[succ] -= 1
+                    if in_degree[succ] == 0:
+                        unblocked.append(succ)
+
+            def release_unblocked():
+                nonlocal sequence
+                while unblocked:
+                    name = unblocked.popleft()
+                    if self.checkpoint is not None:
+                        input_hashes[name] = self._input_hash(name, output_hashes)
+                        cached = self.checkpoint.load(name, input_hashes[name])
+                        if cached is not None:
+                            # Completing from the store may unblock more jobs
+                            result, output_hashes[name] = cached
+                            self.cached_jobs.add(name)
+                            complete(name, result)
+                            continue
+                    self.metrics[name] = {"ready": time.perf_counter() - run_start}
+                    key = -ranks[name] if self.priority else 0
+                    heapq.heappush(ready[routes[self.kinds[name]]], (key, sequence, name))
+                    sequence += 1
+
+            release_unblocked()
+
+            running = {}
+            while any(ready.values()) or running:
+                for pool, (executor, limit) in pools.items():
+                    while ready[pool] and in_flight[pool] < limit:
+                        _, _, name = heapq.heappop(ready[pool])
+                        self.metrics[name]["submit"] = time.perf_counter() - run_start
+                        running[executor.submit(_timed_call, self.jobs[name])] = name
+                        in_flight[pool] += 1
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    in_flight[routes[self.kinds[name]]] -= 1
+                    try:
+                        result, started, ended, worker = future.result()
+                    except Exception as e:
+                        # Dependents of a failed job are never unblocked
+                        print(f"Job {name} failed with error: {e}")
+                        self.failed_jobs[name] = e
+                        continue
+
+                    if self.checkpoint is not None:
+                        try:
+                            output_hashes[name] = self.checkpoint.save(name, input_hashes[name], result)
+                        except (pickle.PicklingError, AttributeError, TypeError) as e:
+                            # The job succeeded, it just can't be stored. A fresh hash keeps its
+                            # dependents from ever matching a stored row, so they run again too.
+                            print(f"Job {name} not checkpointed, its result can't be pickled: {e}")
+                            output_hashes[name] = uuid.uuid4().hex
+                    self.schedule.append((name, started - run_start, ended - run_start))
+                    self.metrics[name].update(
+                        start=started - run_start, finish=ended - run_start, worker=worker
+                    )
+                    self.observed_costs[name] = ended - started
+                    if self.checkpoint is not None:
+                        self.checkpoint.save_duration(name, ended - started)
+                    complete(name, result)
+                release_unblocked()
+            # Measured before the pools shut down, which can take a while for processes
+            self.makespan = time.perf_counter() - run_start
+        self.schedule.sort(key=lambda entry: entry[1])
+
+        skipped = len(self.jobs) - len(self.finished_jobs) - len(self.failed_jobs)
+        if skipped:
+            print(f"{skipped} jobs skipped because a dependency failed.")
+        if self.cached_jobs:
+            print(f"{len(self.cached_jobs)} jobs served from the checkpoint store.")
+        print("All jobs completed.")
+        return self.finished_jobs
+
+    def measured_critical_path(self) -> float:
+        """Longest chain of measured job durations through the jobs that ran last time."""
+        successors = self._successors()
+        longest = {}
+        for name in reversed(self._topological_order(successors)):
+            if "finish" not in self.metrics.get(name, {}):
+                continue
+            duration = self.metrics[name]["finish"] - self.metrics[name]["start"]
+            longest[name] = duration + max((longest.get(succ, 0.0) for succ in successors[name]),
+                                           default=0.0)
+        return max(longest.values(), default=0.0)
+
+    def summary(self) -> Dict[str, object]:
+        """Aggregates of the last run as a plain dict."""
+        ran = [m for m in self.metrics.values() if "finish" in m]
+        busy_by_worker: Dict[str, float] = {}
+        for m in ran:
+            worker = f"{m['worker'][0]}:{m['worker'][1]}"
+            busy_by_worker[worker] = busy_by_worker.get(worker, 0.0) + m["finish"] - m["start"]
+        busy = sum(busy_by_worker.values())
+        queue_waits = [m["start"] - m["ready"] for m in ran]
+        critical_path = self.measured_critical_path()
+        capacity = self.worker_slots * self.makespan
+        return {
+            "jobs_run": len(ran),
+            "jobs_cached": len(self.cached_jobs),
+            "jobs_failed": len(self.failed_jobs),
+            "makespan": self.makespan,
+            "critical_path": critical_path,
+            # Close to 1: dependency-bound; well below 1 with high utilization: worker-bound
+            "critical_path_ratio": critical_path / self.makespan if self.makespan else 0.0,
+            "worker_slots": self.worker_slots,
+            "worker_utilization": busy / capacity if capacity else 0.0,
+            "busy_by_worker": busy_by_worker,
+            "mean_queue_wait": sum(queue_waits) / len(queue_waits) if queue_waits else 0.0,
+            "max_queue_wait": max(queue_waits, default=0.0),
+        }
+
+    def export_chrome_trace(self, path: str):
+        """Writes the last run as chrome://tracing (Trace Event Format) JSON."""
+        events = []
+        for name, m in self.metrics.items():
+            if "finish" not in m:
+                continue
+            pid, tid = m["worker"]
+            events.append({
+                "name": name,
+                "cat": self.kinds[name],
+                "ph": "X",
+                "ts": m["start"] * 1e6,
+                "dur": (m["finish"] - m["start"]) * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": {"ready": m["ready"], "submit": m["submit"],
+                         "queue_wait": m["start"] - m["ready"]},
+            })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def as_get_next_jobs(self):
+        """Adapter returning a get_next_jobs() for the wave-at-a-time job_scheduler."""
+        def get_next_jobs(finished: Set[Job]) -> List[Job]:
+            finished_names = {name for name, job in self.jobs.items() if job in finished}
+            return [job for name, job in self.jobs.items()
+                    if name not in finished_names and self.deps[name] <= finished_names]
+        return get_next_jobs
+
+
 # ===== Example usage =====
 
 # Mock job class for demo
@@ -56,6 +452,16 @@ class DemoJob:
         return f"Job({self.name})"
 
 
+# Created once so that finished jobs are recognised across get_next_jobs calls
+DEMO_JOBS = {
+    'A': DemoJob('A'),
+    'B': DemoJob('B'),
+    'C': DemoJob('C'),
+    'D': DemoJob('D'),
+    'E': DemoJob('E'),
+}
+
+
 def demo_get_next_jobs(finished: Set[Job]) -> List[Job]:
     """
     Mock get_next_jobs for dependency graph:
@@ -68,13 +474,7 @@ def demo_get_next_jobs(finished: Set[Job]) -> List[Job]:
     Jobs: A, B, C, D, E
     """
 
-    jobs = {
-        'A': DemoJob('A'),
-        'B': DemoJob('B'),
-        'C': DemoJob('C'),
-        'D': DemoJob('D'),
-        'E': DemoJob('E'),
-    }
+    jobs = DEMO_JOBS
 
     # Dependency map (job name -> set of dependency job names)
     deps = {
@@ -95,5 +495,183 @@ def demo_get_next_jobs(finished: Set[Job]) -> List[Job]:
     return ready
 
 
+class SleepJob:
+    def __init__(self, name, duration):
+        self.name = name
+        self.duration = duration
+
+    def __call__(self):
+        time.sleep(self.duration)
+
+    def __repr__(self):
+        return f"Job({self.name})"
+
+
+def make_skewed_dag(layers=4, width=8, long_tail=0.5, base=0.02, seed=0):
+    """
+    Builds a layered synthetic DAG where one job per layer is a long-tail job.
+
+    Each job depends on two random jobs of the previous layer, so most of a layer
+    can start long before the slow job of the previous layer finishes.
+    """
+    rng = random.Random(seed)
+    scheduler_jobs = {}
+    deps = {}
+    previous = []
+    for layer in range(layers):
+        current = []
+        slow = rng.randrange(width)
+        for i in range(width):
+            name = f"L{layer}J{i}"
+            duration = long_tail if i == slow else base
+            scheduler_jobs[name] = SleepJob(name, duration)
+            deps[name] = set(rng.sample(previous, min(2, len(previous))))
+            current.append(name)
+        previous = current
+    return scheduler_jobs, deps
+
+
+def benchmark_wave_vs_incremental(max_workers=8, layers=4, width=8):
+    jobs, deps = make_skewed_dag(layers=layers, width=width)
+    scheduler = DagScheduler(max_workers=max_workers)
+    for name, job in jobs.items():
+        scheduler.add_job(name, job, deps[name])
+
+    start = time.perf_counter()
+    job_scheduler(scheduler.as_get_next_jobs(), max_workers=max_workers)
+    wave = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scheduler.run()
+    incremental = time.perf_counter() - start
+
+    print(f"Wave mode makespan:        {wave:.3f}s")
+    print(f"Incremental mode makespan: {incremental:.3f}s ({wave / incremental:.2f}x faster)")
+
+
+def benchmark_critical_path_priority(max_workers=2):
+    """
+    Two short independent jobs are registered before the head of a long chain.
+    FIFO dispatch starts them first and delays the chain; rank order starts the chain first.
+    """
+    for priority in (False, True):
+        scheduler = DagScheduler(max_workers=max_workers, priority=priority)
+        scheduler.add_job('short1', SleepJob('short1', 0.2), cost=0.2)
+        scheduler.add_job('short2', SleepJob('short2', 0.2), cost=0.2)
+        scheduler.add_job('chain1', SleepJob('chain1', 0.2), cost=0.2)
+        scheduler.add_job('chain2', SleepJob('chain2', 0.2), ['chain1'], cost=0.2)
+        scheduler.add_job('chain3', SleepJob('chain3', 0.2), ['chain2'], cost=0.2)
+        scheduler.run()
+        bound = scheduler.lower_bound()
+        mode = "critical-path" if priority else "FIFO"
+        print(f"{mode} makespan: {scheduler.makespan:.3f}s (lower bound {bound:.3f}s)")
+        for name, started, ended in scheduler.schedule:
+            print(f"  {name:<8} {started:.3f}s -> {ended:.3f}s")
+
+
+class CpuJob:
+    """CPU-bound job; defined at module level so ProcessPoolExecutor can pickle it."""
+    def __init__(self, name, iterations):
+        self.name = name
+        self.iterations = iterations
+
+    def __call__(self):
+        total = 0
+        for i in range(self.iterations):
+            total += i * i
+        return total
+
+    def __repr__(self):
+        return f"Job({self.name})"
+
+
+def make_cpu_dag(width=16, iterations=2_000_000):
+    """A fan-out/fan-in DAG: one source, `width` independent CPU-bound jobs, one sink."""
+    jobs = {'source': (CpuJob('source', 1), set())}
+    for i in range(width):
+        jobs[f"cpu{i}"] = (CpuJob(f"cpu{i}", iterations), {'source'})
+    jobs['sink'] = (CpuJob('sink', 1), {f"cpu{i}" for i in range(width)})
+    return jobs
+
+
+def benchmark_executor_backends():
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores})
+    print(f"CPU-bound DAG on {cores} cores")
+    for backend in ("thread", "process", "hybrid"):
+        baseline = None
+        for workers in worker_counts:
+            scheduler = DagScheduler(max_workers=workers, executor=backend)
+            for name, (job, deps) in make_cpu_dag().items():
+                scheduler.add_job(name, job, deps, kind="cpu")
+            scheduler.run()
+            baseline = baseline or scheduler.makespan
+            speedup = baseline / scheduler.makespan
+            print(f"  {backend:<8} workers={workers:<3} makespan={scheduler.makespan:.3f}s "
+                  f"speedup={speedup:.2f}x")
+
+
+class FlakyJob(SleepJob):
+    """Fails while `crash` is set, to simulate a scheduler run dying half-way."""
+    crash = True
+
+    def __call__(self):
+        if FlakyJob.crash:
+            raise RuntimeError("simulated crash")
+        return super().__call__()
+
+
+def benchmark_checkpoint_resume(duration=0.2):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CheckpointStore(os.path.join(tmp, "checkpoint.db"))
+
+        def build():
+            scheduler = DagScheduler(max_workers=2, checkpoint=store)
+            scheduler.add_job('extract', SleepJob('extract', duration))
+            scheduler.add_job('clean', SleepJob('clean', duration), ['extract'])
+            scheduler.add_job('train', SleepJob('train', duration), ['clean'])
+            scheduler.add_job('report', FlakyJob('report', duration), ['train'])
+            return scheduler
+
+        FlakyJob.crash = True
+        start = time.perf_counter()
+        build().run()
+        print(f"First run (crashed at 'report'): {time.perf_counter() - start:.3f}s")
+
+        FlakyJob.crash = False
+        start = time.perf_counter()
+        scheduler = build()
+        scheduler.run()
+        print(f"Resumed run: {time.perf_counter() - start:.3f}s, "
+              f"served from checkpoint: {sorted(scheduler.cached_jobs)}")
+        # Durations measured by the first run came back through the store
+        assert scheduler.observed_costs["extract"] >= duration
+
+        # A result that can't be pickled is not stored, but the run carries on
+        scheduler = DagScheduler(max_workers=2, checkpoint=store)
+        scheduler.add_job('closure', lambda: (lambda: 1))
+        scheduler.add_job('consumer', SleepJob('consumer', 0), ['closure'])
+        scheduler.run()
+        assert scheduler.finished_jobs == {'closure', 'consumer'} and not scheduler.failed_jobs
+
+        start = time.perf_counter()
+        build().run()
+        print(f"Re-run with unchanged inputs: {time.perf_counter() - start:.3f}s")
+        store.close()
+
+
 if __name__ == "__main__":
     job_scheduler(demo_get_next_jobs)
+    benchmark_wave_vs_incremental()
+    benchmark_critical_path_priority()
+    benchmark_executor_backends()
+    benchmark_checkpoint_resume()
+
+    jobs, deps = make_skewed_dag()
+    scheduler = DagScheduler(max_workers=4)
+    for name, job in jobs.items():
+        scheduler.add_job(name, job, deps[name])
+    scheduler.run()
+    print(json.dumps(scheduler.summary(), indent=2))
+    scheduler.export_chrome_trace("job_scheduler_trace.json")
+    print("Trace written to job_scheduler_trace.json, open it in chrome://tracing")
@@ -1,4 +1,17 @@
-from collections import defaultdict, OrderedDict
+import asyncio
+import functools
+import hashlib
+import inspect
+import multiprocessing
+import random
+import struct
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import Counter, defaultdict, OrderedDict
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
 
 class LFUCache:
     def __init__(self, capacity: int):
@@ -30,10 +43,10 @@ class LFUCache:
         # Update the key's frequency
         self.key_to_val_freq[key] = (value, freq + 1)
 
-    def get(self, key: int) -> int:
-        # If key doesn't exist, return -1
+    def get(self, key: int, default=-1) -> int:
+        # If key doesn't exist, return -1 (or the given default, to tell apart a stored -1)
         if key not in self.key_to_val_freq:
-            return -1
+            return default
         
         # Increase the frequency of the key and return its value
         self._update_freq(key)
@@ -52,15 +65,1370 @@ class LFUCache:
         
         # If capacity reached, evict least frequently used key
         if len(self.key_to_val_freq) >= self.capacity:
-            # Evict the least recently used key from the lowest frequency bucket
-            evict_key, _ = self.freq_to_keys[self.min_freq].popitem(last=False)
-            del self.key_to_val_freq[evict_key]
-            
-            # If that frequency bucket is now empty, remove it
-            if not self.freq_to_keys[self.min_freq]:
-                del self.freq_to_keys[self.min_freq]
+            self._evict()
         
         # Insert the new key with frequency 1
         self.key_to_val_freq[key] = (value, 1)
         self.freq_to_keys[1][key] = None
         self.min_freq = 1
+
+    def get_many(self, keys, default=-1) -> list:
+        """
+        Looks up a batch of keys in one pass, leaving the cache exactly as the same
+        sequence of get() calls would. Each distinct hit key moves buckets once, by the
+        number of times it occurs, and keys are moved in order of their last occurrence,
+        which reproduces the LRU order inside the buckets.
+        """
+        key_to_val_freq = self.key_to_val_freq
+        freq_to_keys = self.freq_to_keys
+        # Re-inserting on every occurrence keeps the dict in order of last occurrence
+        counts = {}
+        for key in keys:
+            counts[key] = counts.pop(key, 0) + 1
+
+        recompute_min = False
+        for key, count in counts.items():
+            entry = key_to_val_freq.get(key)
+            if entry is None:
+                continue
+            value, freq = entry
+            bucket = freq_to_keys[freq]
+            del bucket[key]
+            if not bucket:
+                del freq_to_keys[freq]
+                if freq == self.min_freq:
+                    # The next lowest bucket may lie anywhere below freq + count
+                    recompute_min = True
+            freq_to_keys[freq + count][key] = None
+            key_to_val_freq[key] = (value, freq + count)
+        if recompute_min:
+            self.min_freq = min(freq_to_keys, default=0)
+
+        return [key_to_val_freq[key][0] if key in key_to_val_freq else default for key in keys]
+
+    def put_many(self, items) -> None:
+        # Evictions interleave with inserts, so puts are applied in order; the win is
+        # one call (and, in ConcurrentLFUCache, one lock acquisition) per batch
+        put = self.put
+        for key, value in items:
+            put(key, value)
+
+    def _evict(self):
+        # Evict the least recently used key from the lowest frequency bucket
+        evict_key, _ = self.freq_to_keys[self.min_freq].popitem(last=False)
+        del self.key_to_val_freq[evict_key]
+        
+        # If that frequency bucket is now empty, remove it and find the next lowest one
+        # (put() resets min_freq to 1 right after, but callers evicting on their own need it)
+        if not self.freq_to_keys[self.min_freq]:
+            del self.freq_to_keys[self.min_freq]
+            self.min_freq = min(self.freq_to_keys, default=0)
+        return evict_key
+
+    def _victim(self):
+        # The key _evict() would remove next, without removing it
+        return next(iter(self.freq_to_keys[self.min_freq]))
+
+    def _remove(self, key):
+        # Drop an arbitrary key (e.g. expired), keeping min_freq valid
+        _, freq = self.key_to_val_freq.pop(key)
+        del self.freq_to_keys[freq][key]
+        if not self.freq_to_keys[freq]:
+            del self.freq_to_keys[freq]
+            if self.min_freq == freq:
+                self.min_freq = min(self.freq_to_keys, default=0)
+
+    def __len__(self):
+        return len(self.key_to_val_freq)
+
+
+class DecayingLFUCache(LFUCache):
+    """
+    LFUCache whose frequencies are halved every decay_every_ops operations and/or every
+    decay_every_seconds, so keys that were hot yesterday stop pinning the cache.
+
+    A decay never scans the cache: it only advances an epoch counter. Buckets are keyed by
+    (frequency, epoch) and a bucket's effective frequency is frequency >> (current epoch -
+    its epoch), so every bucket is halved implicitly. A key is brought up to date lazily,
+    when it is next touched: it moves to the (effective frequency + 1, current epoch) bucket.
+    The eviction bucket (lowest effective frequency, older epoch first) is found again by
+    scanning the buckets, not the keys, whenever it empties or a decay happens.
+    """
+
+    def __init__(self, capacity: int, decay_every_ops=None, decay_every_seconds=None):
+        super().__init__(capacity)
+        # Maps key to a tuple: (value, frequency, epoch the frequency was counted in)
+        self.key_to_val_freq = {}
+        # Maps (frequency, epoch) to keys in that bucket, in order of usage (LRU)
+        self.freq_to_keys = defaultdict(OrderedDict)
+        self.decay_every_ops = decay_every_ops
+        self.decay_every_seconds = decay_every_seconds
+        self.epoch = 0
+        self.ops = 0
+        self.next_decay_at = time.monotonic() + decay_every_seconds if decay_every_seconds else None
+        # Bucket to evict from next; None means it must be recomputed
+        self.min_bucket = None
+
+    def _tick(self):
+        self.ops += 1
+        if self.decay_every_ops and self.ops % self.decay_every_ops == 0:
+            self.epoch += 1
+            self.min_bucket = None
+        if self.next_decay_at is not None:
+            now = time.monotonic()
+            while now >= self.next_decay_at:
+                self.epoch += 1
+                self.next_decay_at += self.decay_every_seconds
+                self.min_bucket = None
+
+    def _effective(self, bucket) -> int:
+        freq, epoch = bucket
+        return freq >> (self.epoch - epoch)
+
+    def _eviction_order(self, bucket):
+        return self._effective(bucket), bucket[1]
+
+    def _update_freq(self, key):
+        value, freq, epoch = self.key_to_val_freq[key]
+        bucket = (freq, epoch)
+        del self.freq_to_keys[bucket][key]
+        if not self.freq_to_keys[bucket]:
+            del self.freq_to_keys[bucket]
+            if self.min_bucket == bucket:
+                self.min_bucket = None
+
+        # Apply the halvings this key missed, then count the access in the current epoch
+        new_freq = self._effective(bucket) + 1
+        self.freq_to_keys[(new_freq, self.epoch)][key] = None
+        self.key_to_val_freq[key] = (value, new_freq, self.epoch)
+
+    def get(self, key: int, default=-1) -> int:
+        self._tick()
+        return super().get(key, default)
+
+    def get_many(self, keys, default=-1) -> list:
+        # Each lookup may cross a decay boundary, so no batching of bucket moves here
+        return [self.get(key, default) for key in keys]
+
+    def put(self, key: int, value: int) -> None:
+        self._tick()
+        if self.capacity <= 0:
+            return
+
+        if key in self.key_to_val_freq:
+            _, freq, epoch = self.key_to_val_freq[key]
+            self.key_to_val_freq[key] = (value, freq, epoch)
+            self._update_freq(key)
+            return
+
+        if len(self.key_to_val_freq) >= self.capacity:
+            self._evict()
+
+        bucket = (1, self.epoch)
+        self.key_to_val_freq[key] = (value, 1, self.epoch)
+        self.freq_to_keys[bucket][key] = None
+        if self.min_bucket is not None and self._eviction_order(bucket) < self._eviction_order(self.min_bucket):
+            self.min_bucket = bucket
+
+    def _find_min_bucket(self):
+        if self.min_bucket is None:
+            self.min_bucket = min(self.freq_to_keys, key=self._eviction_order)
+        return self.min_bucket
+
+    def _evict(self):
+        bucket = self._find_min_bucket()
+        evict_key, _ = self.freq_to_keys[bucket].popitem(last=False)
+        del self.key_to_val_freq[evict_key]
+        if not self.freq_to_keys[bucket]:
+            del self.freq_to_keys[bucket]
+            self.min_bucket = None
+        return evict_key
+
+    def _victim(self):
+        return next(iter(self.freq_to_keys[self._find_min_bucket()]))
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: a deadline lands in slot (deadline // tick) % slots. Advancing the
+    clock only visits the slots whose ticks have passed, so expiry costs O(1) amortized per
+    entry instead of a scan of the whole cache. Keys whose deadline is more than one
+    revolution away stay in their slot until a later pass.
+    """
+
+    def __init__(self, tick: float, slots: int, now: float):
+        self.tick = tick
+        self.slots = [set() for _ in range(slots)]
+        self.deadlines = {}
+        self.current_tick = int(now // tick)
+
+    def _slot(self, deadline: float) -> set:
+        return self.slots[int(deadline // self.tick) % len(self.slots)]
+
+    def schedule(self, key, deadline: float):
+        self.cancel(key)
+        self.deadlines[key] = deadline
+        self._slot(deadline).add(key)
+
+    def cancel(self, key):
+        deadline = self.deadlines.pop(key, None)
+        if deadline is not None:
+            self._slot(deadline).discard(key)
+
+    def is_expired(self, key, now: float) -> bool:
+        deadline = self.deadlines.get(key)
+        return deadline is not None and deadline <= now
+
+    def advance(self, now: float):
+        """Returns the keys that expired since the last call."""
+        target_tick = int(now // self.tick)
+        # After a long pause every slot is due; visit each one only once
+        ticks = range(self.current_tick, target_tick + 1)
+        if len(ticks) > len(self.slots):
+            ticks = range(target_tick - len(self.slots) + 1, target_tick + 1)
+        expired = []
+        for tick in ticks:
+            slot = self.slots[tick % len(self.slots)]
+            expired.extend(key for key in slot if self.deadlines[key] <= now)
+        for key in expired:
+            self.cancel(key)
+        self.current_tick = target_tick
+        return expired
+
+
+class ExpiringLFUCache(LFUCache):
+    """
+    LFUCache with per-entry TTL and an optional size-weighted capacity.
+
+    Entries expire ttl seconds after their last put (put(..., ttl=...) or default_ttl);
+    expiry is driven by a TimerWheel on every operation, and get() also checks the exact
+    deadline so an expired value is never returned. With a weigher (e.g. len for bytes
+    values), capacity is a total weight budget and LFU eviction continues until the new
+    item fits; an item heavier than the whole budget is not cached.
+    """
+
+    def __init__(self, capacity: int, default_ttl=None, weigher=None, tick: float = 1.0,
+                 wheel_slots: int = 512, clock=time.monotonic):
+        super().__init__(capacity)
+        self.default_ttl = default_ttl
+        self.weigher = weigher or (lambda value: 1)
+        self.weights = {}
+        self.total_weight = 0
+        self.clock = clock
+        self.wheel = TimerWheel(tick, wheel_slots, clock())
+
+    def _expire(self, now):
+        for key in self.wheel.advance(now):
+            self._remove(key)
+
+    def get(self, key: int, default=-1) -> int:
+        now = self.clock()
+        self._expire(now)
+        if self.wheel.is_expired(key, now):
+            self._remove(key)
+        return super().get(key, default)
+
+    def get_many(self, keys, default=-1) -> list:
+        # Every lookup must check expiry, so no batching of bucket moves here
+        return [self.get(key, default) for key in keys]
+
+    def put(self, key: int, value: int, ttl=None) -> None:
+        now = self.clock()
+        self._expire(now)
+        if self.capacity <= 0:
+            return
+
+        weight = self.weigher(value)
+        if weight > self.capacity:
+            # Can never fit; don't leave a stale value behind either
+            if key in self.key_to_val_freq:
+                self._remove(key)
+            return
+
+        if key in self.key_to_val_freq:
+            self.total_weight += weight - self.weights[key]
+            self.weights[key] = weight
+            super().put(key, value)
+            while self.total_weight > self.capacity:
+                self._evict()
+            if key not in self.key_to_val_freq:
+                # Its new weight pushed it out as the least frequently used key
+                return
+        else:
+            while self.total_weight + weight > self.capacity:
+                self._evict()
+            self.key_to_val_freq[key] = (value, 1)
+            self.freq_to_keys[1][key] = None
+            self.min_freq = 1
+            self.weights[key] = weight
+            self.total_weight += weight
+
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is not None:
+            self.wheel.schedule(key, now + ttl)
+        else:
+            self.wheel.cancel(key)
+
+    def _forget(self, key):
+        self.total_weight -= self.weights.pop(key)
+        self.wheel.cancel(key)
+
+    def _evict(self):
+        evict_key = super()._evict()
+        self._forget(evict_key)
+        return evict_key
+
+    def _remove(self, key):
+        super()._remove(key)
+        self._forget(key)
+
+
+class CompactLFUCache:
+    """
+    LFUCache with the same eviction order but far fewer Python objects per entry.
+
+    Entries live in slots of parallel arrays: keys and values in lists, frequency and
+    prev/next links in array('q') (8 bytes each, no int objects). Every frequency bucket
+    is an intrusive circular doubly linked list threaded through prev/next, and
+    bucket_head maps a frequency to its least recently used slot. Updating a frequency
+    relinks a slot instead of allocating a tuple or an OrderedDict bucket, and slots
+    freed by eviction are reused by the next insert.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # Maps key to its slot index in the arrays below
+        self.slot_of = {}
+        self.keys = []
+        self.values = []
+        self.freq = array('q')
+        self.prev = array('q')
+        self.next = array('q')
+        # Maps frequency to the slot at the head (LRU end) of that frequency's list
+        self.bucket_head = {}
+        self.free_slots = []
+        # Tracks the minimum frequency of any key currently in the cache
+        self.min_freq = 0
+
+    def _unlink(self, slot) -> bool:
+        # Remove the slot from its frequency list; returns True if the list became empty
+        freq = self.freq[slot]
+        prev, nxt = self.prev[slot], self.next[slot]
+        if nxt == slot:
+            del self.bucket_head[freq]
+            return True
+        self.next[prev] = nxt
+        self.prev[nxt] = prev
+        if self.bucket_head[freq] == slot:
+            self.bucket_head[freq] = nxt
+        return False
+
+    def _append(self, slot, freq):
+        # Add the slot at the tail (MRU end) of the frequency list
+        self.freq[slot] = freq
+        head = self.bucket_head.get(freq)
+        if head is None:
+            self.prev[slot] = self.next[slot] = slot
+            self.bucket_head[freq] = slot
+            return
+        tail = self.prev[head]
+        self.next[tail] = slot
+        self.prev[slot] = tail
+        self.next[slot] = head
+        self.prev[head] = slot
+
+    def _update_freq(self, slot):
+        freq = self.freq[slot]
+        if self._unlink(slot) and self.min_freq == freq:
+            self.min_freq += 1
+        self._append(slot, freq + 1)
+
+    def get(self, key: int, default=-1) -> int:
+        slot = self.slot_of.get(key)
+        if slot is None:
+            return default
+        self._update_freq(slot)
+        return self.values[slot]
+
+    def put(self, key: int, value: int) -> None:
+        if self.capacity <= 0:
+            return
+
+        slot = self.slot_of.get(key)
+        if slot is not None:
+            self.values[slot] = value
+            self._update_freq(slot)
+            return
+
+        if len(self.slot_of) >= self.capacity:
+            self._evict()
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.keys[slot] = key
+            self.values[slot] = value
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.values.append(value)
+            self.freq.append(0)
+            self.prev.append(0)
+            self.next.append(0)
+        self.slot_of[key] = slot
+        self._append(slot, 1)
+        self.min_freq = 1
+
+    def _evict(self):
+        slot = self.bucket_head[self.min_freq]
+        evict_key = self.keys[slot]
+        emptied = self._unlink(slot)
+        del self.slot_of[evict_key]
+        self.keys[slot] = self.values[slot] = None
+        self.free_slots.append(slot)
+        if emptied:
+            self.min_freq = min(self.bucket_head, default=0)
+        return evict_key
+
+    def __len__(self):
+        return len(self.slot_of)
+
+
+class CountMinSketch:
+    """
+    Approximate access counts in `depth` rows of 4-bit counters (stored one per byte).
+    After sample_size increments every counter is halved, so old popularity fades.
+    A doorkeeper bloom filter absorbs the first access of each key, keeping
+    one-hit wonders out of the sketch altogether; it is cleared on every reset.
+    """
+    MAX_COUNT = 15
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MASK64 = (1 << 64) - 1
+
+    def __init__(self, capacity: int, depth: int = 4):
+        # Width is a power of two >= capacity, so an index is just the top bits of a hash
+        self.width_bits = max(4, (max(capacity, 1) - 1).bit_length())
+        self.depth = depth
+        self.table = [bytearray(1 << self.width_bits) for _ in range(depth)]
+        self.doorkeeper = bytearray(1 << self.width_bits)
+        self.sample_size = 10 * max(capacity, 1)
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        shift = 64 - self.width_bits
+        return [((h * seed) & self.MASK64) >> shift for seed in self.SEEDS[:self.depth]]
+
+    def _in_doorkeeper(self, indexes) -> bool:
+        return all(self.doorkeeper[i] for i in indexes[:2])
+
+    def increment(self, key):
+        indexes = self._indexes(key)
+        if not self._in_doorkeeper(indexes):
+            for i in indexes[:2]:
+                self.doorkeeper[i] = 1
+        else:
+            for row, i in zip(self.table, indexes):
+                if row[i] < self.MAX_COUNT:
+                    row[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._reset()
+
+    def estimate(self, key) -> int:
+        indexes = self._indexes(key)
+        count = min(row[i] for row, i in zip(self.table, indexes))
+        return count + (1 if self._in_doorkeeper(indexes) else 0)
+
+    def _reset(self):
+        # Aging: halve every counter and forget who has been seen once
+        for row in self.table:
+            row[:] = bytes(count >> 1 for count in row)
+        self.doorkeeper = bytearray(len(self.doorkeeper))
+        self.additions //= 2
+
+
+class TinyLFUCache:
+    """
+    W-TinyLFU: a small LRU window in front of an LFUCache main region, guarded by a
+    CountMinSketch admission filter.
+
+    New keys always enter the window. When the window overflows, its LRU key becomes a
+    candidate for the main region and is only admitted if its estimated frequency beats
+    that of the entry the main region would evict; otherwise the candidate is dropped.
+    A scan of one-hit wonders therefore churns through the window without flushing the
+    hot set out of the main region.
+    """
+
+    def __init__(self, capacity: int, window_ratio: float = 0.01):
+        self.capacity = capacity
+        self.window_capacity = max(1, int(capacity * window_ratio)) if capacity > 0 else 0
+        self.window = OrderedDict()
+        self.main = LFUCache(capacity - self.window_capacity)
+        self.sketch = CountMinSketch(capacity)
+
+    def get(self, key: int, default=-1) -> int:
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+            return self.window[key]
+        return self.main.get(key, default)
+
+    def put(self, key: int, value: int) -> None:
+        if self.capacity <= 0:
+            return
+        if key in self.window:
+            self.window[key] = value
+            self.window.move_to_end(key)
+            return
+        if key in self.main.key_to_val_freq:
+            self.main.put(key, value)
+            return
+
+        self.sketch.increment(key)
+        self.window[key] = value
+        if len(self.window) <= self.window_capacity:
+            return
+
+        candidate, candidate_value = self.window.popitem(last=False)
+        if len(self.main) < self.main.capacity:
+            self.main.put(candidate, candidate_value)
+        elif self.main.capacity > 0:
+            victim = self.main._victim()
+            if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                self.main._evict()
+                self.main.put(candidate, candidate_value)
+
+    def __len__(self):
+        return len(self.window) + len(self.main)
+
+
+class ConcurrentLFUCache:
+    """
+    Thread-safe LFU cache striped over independent LFUCache segments.
+
+    Each key hashes to one segment with its own lock, freq_to_keys and min_freq, so
+    threads touching different segments never contend. By default each segment gets an
+    equal share of the capacity and evicts locally. With approximate_global_eviction the
+    capacity is shared: when the cache is full, a few random segments are sampled and the
+    one with the lowest min_freq gives up its LFU key, approximating a global LFU order.
+    Local eviction uses at most capacity // MIN_SHARD_CAPACITY segments: with only a few
+    entries per segment, keys that happen to share one evict each other long before the
+    cache is full.
+    """
+    MIN_SHARD_CAPACITY = 32
+
+    def __init__(self, capacity: int, num_shards: int = 16, approximate_global_eviction=False,
+                 eviction_samples: int = 4):
+        self.capacity = capacity
+        if not approximate_global_eviction:
+            num_shards = max(1, min(num_shards, capacity // self.MIN_SHARD_CAPACITY))
+        self.num_shards = num_shards
+        self.approximate_global_eviction = approximate_global_eviction
+        self.eviction_samples = min(eviction_samples, num_shards)
+        if approximate_global_eviction:
+            # Segments are unbounded and never evict on their own, or an eviction would
+            # bypass self.size; the global size counter decides
+            self.shards = [LFUCache(float("inf")) for _ in range(num_shards)]
+        else:
+            # Spread the remainder so segment capacities add up to exactly `capacity`
+            base, extra = divmod(capacity, num_shards)
+            self.shards = [LFUCache(base + (1 if i < extra else 0)) for i in range(num_shards)]
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+        self.size = 0
+        self.size_lock = threading.Lock()
+
+    def _shard_index(self, key) -> int:
+        return hash(key) % self.num_shards
+
+    def get(self, key: int, default=-1) -> int:
+        index = self._shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].get(key, default)
+
+    def put(self, key: int, value: int) -> None:
+        if self.capacity <= 0:
+            return
+        index = self._shard_index(key)
+        with self.locks[index]:
+            shard = self.shards[index]
+            is_new = key not in shard.key_to_val_freq
+            shard.put(key, value)
+        if not (self.approximate_global_eviction and is_new):
+            return
+
+        with self.size_lock:
+            self.size += 1
+            over_capacity = self.size > self.capacity
+        # Evict after releasing the segment lock: taking a second segment lock while
+        # holding one could deadlock with a thread doing the same in the other order
+        if over_capacity:
+            self._evict_global()
+
+    def _group_by_shard(self, keys):
+        groups = defaultdict(list)
+        for position, key in enumerate(keys):
+            groups[self._shard_index(key)].append(position)
+        return groups
+
+    def get_many(self, keys, default=-1) -> list:
+        """Batched get: each segment lock is taken once per batch, not once per key."""
+        keys = list(keys)
+        results = [default] * len(keys)
+        for index, positions in self._group_by_shard(keys).items():
+            with self.locks[index]:
+                values = self.shards[index].get_many([keys[p] for p in positions], default)
+            for position, value in zip(positions, values):
+                results[position] = value
+        return results
+
+    def put_many(self, items) -> None:
+        """Batched put: each segment lock is taken once per batch, not once per key."""
+        if self.capacity <= 0:
+            return
+        items = list(items)
+        new_keys = 0
+        for index, positions in self._group_by_shard([key for key, _ in items]).items():
+            with self.locks[index]:
+                shard = self.shards[index]
+                for position in positions:
+                    key, value = items[position]
+                    new_keys += key not in shard.key_to_val_freq
+                    shard.put(key, value)
+        if not self.approximate_global_eviction:
+            return
+
+        with self.size_lock:
+            self.size += new_keys
+            excess = self.size - self.capacity
+        for _ in range(max(0, min(excess, new_keys))):
+            self._evict_global()
+
+    def _evict_global(self):
+        # min_freq is read without the segment locks; a stale value only makes the choice
+        # of victim segment less accurate, the eviction itself happens under the lock
+        sampled = random.sample(range(self.num_shards), self.eviction_samples)
+        non_empty = [i for i in sampled if len(self.shards[i])] or \
+                    [i for i in range(self.num_shards) if len(self.shards[i])]
+        for index in sorted(non_empty, key=lambda i: self.shards[i].min_freq):
+            with self.locks[index]:
+                if len(self.shards[index]):
+                    self.shards[index]._evict()
+                    break
+        else:
+            return
+        with self.size_lock:
+            self.size -= 1
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+
+_MISSING = object()
+# Separates positional from keyword arguments in lfu_cached keys, as in functools._make_key
+_KWD_MARK = object()
+
+
+class LoadingLFUCache:
+    """
+    ConcurrentLFUCache that loads missing values itself, with single-flight loading:
+    concurrent misses on the same key wait for the one in-flight load instead of each
+    calling the loader (no thundering herd). get_or_load() is for threads and
+    aget_or_load() for coroutines on one event loop; both share the same cache.
+    """
+
+    def __init__(self, capacity: int, num_shards: int = 16):
+        self.cache = ConcurrentLFUCache(capacity, num_shards=num_shards)
+        self.lock = threading.Lock()
+        # key -> Future of the in-flight load (concurrent.futures for threads, asyncio Task for coroutines)
+        self.in_flight = {}
+        self.async_in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # misses that waited on another caller's load
+        self.loads = 0
+        self.load_failures = 0
+        self.load_time = 0.0
+
+    def get_or_load(self, key, loader):
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            with self.lock:
+                self.hits += 1
+            return value
+
+        with self.lock:
+            # The previous leader puts into the cache before leaving in_flight, so a miss
+            # that raced with it finds the value here instead of loading again
+            value = self.cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            future = self.in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self.in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not is_leader:
+            return future.result()
+
+        try:
+            value = self._timed_load(key, loader)
+            self.cache.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def _timed_load(self, key, loader):
+        start = time.perf_counter()
+        try:
+            value = loader(key)
+        except BaseException:
+            with self.lock:
+                self.load_failures += 1
+            raise
+        with self.lock:
+            self.loads += 1
+            self.load_time += time.perf_counter() - start
+        return value
+
+    async def aget_or_load(self, key, loader):
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            with self.lock:
+                self.hits += 1
+            return value
+
+        task = self.async_in_flight.get(key)
+        with self.lock:
+            self.misses += 1
+            if task is not None:
+                self.coalesced += 1
+        if task is None:
+            task = self.async_in_flight[key] = asyncio.ensure_future(self._aload(key, loader))
+        # shield: one waiter being cancelled must not cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    async def _aload(self, key, loader):
+        start = time.perf_counter()
+        try:
+            value = await loader(key)
+        except BaseException:
+            with self.lock:
+                self.load_failures += 1
+            raise
+        finally:
+            del self.async_in_flight[key]
+        with self.lock:
+            self.loads += 1
+            self.load_time += time.perf_counter() - start
+        self.cache.put(key, value)
+        return value
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "mean_load_time": self.load_time / self.loads if self.loads else 0.0,
+            }
+
+
+def lfu_cached(capacity: int = 128, num_shards: int = 16):
+    """
+    Memoizes a function (sync or async) in a LoadingLFUCache keyed by its arguments, so
+    concurrent calls with the same arguments share one computation. The cache is exposed
+    as wrapper.cache, e.g. wrapper.cache.stats().
+    """
+    def decorator(func):
+        cache = LoadingLFUCache(capacity, num_shards)
+
+        def make_key(args, kwargs):
+            return args + (_KWD_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await cache.aget_or_load(make_key(args, kwargs), lambda _: func(*args, **kwargs))
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return cache.get_or_load(make_key(args, kwargs), lambda _: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+class SharedMemoryLFUCache:
+    """
+    LFU cache whose table lives in multiprocessing.shared_memory, so all worker
+    processes on a host share one cache instead of each holding its own copy.
+
+    Keys and values are bytes of at most max_key_size / max_value_size, stored in
+    fixed-size slots of an open-addressing hash table (linear probing, twice as many
+    slots as capacity). Deletion shifts the rest of the probe chain back instead of
+    leaving tombstones, so a miss stops at the first empty slot however long the cache
+    churns. Each slot keeps its access count and a logical last-used clock.
+    Pointer-linked frequency buckets don't fit fixed-size shared slots, so eviction is
+    sampled LFU: eviction_samples occupied slots are picked at random and the one with the
+    lowest (frequency, last used) goes. A multiprocessing.Lock serialises all operations.
+
+    Create it in the parent before forking workers. With the spawn or forkserver start
+    method, create it with that multiprocessing context (its lock must come from the
+    same one) and pass it to the child as a Process argument: it re-attaches to the
+    segment by name.
+    """
+    HEADER = struct.Struct("<QQ")      # entry count, logical clock
+    SLOT = struct.Struct("<BIQHI")     # state, frequency, last used, key length, value length
+    EMPTY, OCCUPIED = 0, 1
+    MAX_FREQ = 2 ** 32 - 1
+
+    def __init__(self, capacity: int, max_key_size: int = 64, max_value_size: int = 256,
+                 eviction_samples: int = 5, context=None):
+        self.capacity = capacity
+        self.max_key_size = max_key_size
+        self.max_value_size = max_value_size
+        self.eviction_samples = eviction_samples
+        self.table_size = max(2 * capacity, 1)
+        self.slot_size = self.SLOT.size + max_key_size + max_value_size
+        size = self.HEADER.size + self.table_size * self.slot_size
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.shm.buf[:size] = bytes(size)
+        self.lock = (context or multiprocessing).Lock()
+        self.owner = True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["shm"] = self.shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=state["shm"])
+        # Only the creating process may unlink the segment. A process multiprocessing
+        # started shares its parent's resource tracker, which holds each name once, so
+        # it must leave the parent's registration alone; any other process has its own
+        # tracker, which would destroy the segment when the process exits. A spawned
+        # child unpickles its Process arguments before parent_process() is set, while
+        # _inheriting is.
+        child = (multiprocessing.parent_process() is not None
+                 or getattr(multiprocessing.current_process(), "_inheriting", False))
+        if not child:
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.owner = False
+
+    def _offset(self, index: int) -> int:
+        return self.HEADER.size + index * self.slot_size
+
+    def _hash(self, key: bytes) -> int:
+        # Python's hash() is randomised per process, so use a stable one
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+    def _slot_key(self, offset: int, key_len: int) -> bytes:
+        start = offset + self.SLOT.size
+        return bytes(self.shm.buf[start:start + key_len])
+
+    def _find(self, key: bytes):
+        """Returns (index of key or None, index where key would be inserted)."""
+        buf = self.shm.buf
+        index = self._hash(key) % self.table_size
+        # At most half the slots are occupied, so the probe always reaches an empty one
+        while True:
+            offset = self._offset(index)
+            if buf[offset] == self.EMPTY:
+                return None, index
+            key_len = self.SLOT.unpack_from(buf, offset)[3]
+            if key_len == len(key) and self._slot_key(offset, key_len) == key:
+                return index, None
+            index = (index + 1) % self.table_size
+
+    def _tick(self) -> int:
+        count, clock = self.HEADER.unpack_from(self.shm.buf, 0)
+        self.HEADER.pack_into(self.shm.buf, 0, count, clock + 1)
+        return clock + 1
+
+    def _add_count(self, delta: int):
+        count, clock = self.HEADER.unpack_from(self.shm.buf, 0)
+        self.HEADER.pack_into(self.shm.buf, 0, count + delta, clock)
+
+    def _touch(self, offset: int, value: bytes = None):
+        buf = self.shm.buf
+        state, freq, _, key_len, value_len = self.SLOT.unpack_from(buf, offset)
+        if value is not None:
+            value_len = len(value)
+            start = offset + self.SLOT.size + self.max_key_size
+            buf[start:start + value_len] = value
+        self.SLOT.pack_into(buf, offset, state, min(freq + 1, self.MAX_FREQ), self._tick(),
+                            key_len, value_len)
+
+    def get(self, key: bytes, default=-1):
+        with self.lock:
+            index, _ = self._find(key)
+            if index is None:
+                return default
+            offset = self._offset(index)
+            self._touch(offset)
+            key_len, value_len = self.SLOT.unpack_from(self.shm.buf, offset)[3:]
+            start = offset + self.SLOT.size + self.max_key_size
+            return bytes(self.shm.buf[start:start + value_len])
+
+    def put(self, key: bytes, value: bytes) -> None:
+        if len(key) > self.max_key_size or len(value) > self.max_value_size:
+            raise ValueError("key or value larger than the slot size")
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            index, insert_at = self._find(key)
+            if index is not None:
+                self._touch(self._offset(index), value)
+                return
+
+            if len(self) >= self.capacity:
+                self._evict()
+                # The eviction may have changed the probe chain
+                _, insert_at = self._find(key)
+
+            buf = self.shm.buf
+            offset = self._offset(insert_at)
+            start = offset + self.SLOT.size
+            buf[start:start + len(key)] = key
+            start += self.max_key_size
+            buf[start:start + len(value)] = value
+            self.SLOT.pack_into(buf, offset, self.OCCUPIED, 1, self._tick(), len(key), len(value))
+            self._add_count(1)
+
+    def _evict(self):
+        buf = self.shm.buf
+        victim, victim_rank = None, None
+        found = 0
+        # At most half the table is occupied, so a random probe hits an entry half the time
+        for _ in range(self.table_size * 4):
+            index = random.randrange(self.table_size)
+            state, freq, last_used, _, _ = self.SLOT.unpack_from(buf, self._offset(index))
+            if state != self.OCCUPIED:
+                continue
+            if victim_rank is None or (freq, last_used) < victim_rank:
+                victim, victim_rank = index, (freq, last_used)
+            found += 1
+            if found >= self.eviction_samples:
+                break
+        if victim is not None:
+            self._delete(victim)
+
+    def _delete(self, index: int):
+        buf = self.shm.buf
+        hole = index
+        index = (index + 1) % self.table_size
+        # Backward shift: walk the rest of the chain and move each entry whose home slot is
+        # not between the hole and itself into the hole, so no probe crosses a gap
+        while buf[self._offset(index)] != self.EMPTY:
+            offset = self._offset(index)
+            key_len = self.SLOT.unpack_from(buf, offset)[3]
+            home = self._hash(self._slot_key(offset, key_len)) % self.table_size
+            if (index - home) % self.table_size >= (index - hole) % self.table_size:
+                hole_offset = self._offset(hole)
+                buf[hole_offset:hole_offset + self.slot_size] = buf[offset:offset + self.slot_size]
+                hole = index
+            index = (index + 1) % self.table_size
+        buf[self._offset(hole)] = self.EMPTY
+        self._add_count(-1)
+
+    def slot_states(self):
+        """Counter of slot states over the whole table."""
+        return Counter(self.shm.buf[self._offset(i)] for i in range(self.table_size))
+
+    def __len__(self):
+        return self.HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class GlobalLockLFUCache(LFUCache):
+    """Baseline for the benchmark: the whole LFUCache behind one mutex."""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.lock = threading.Lock()
+
+    def get(self, key: int, default=-1) -> int:
+        with self.lock:
+            return super().get(key, default)
+
+    def put(self, key: int, value: int) -> None:
+        with self.lock:
+            super().put(key, value)
+
+
+def zipf_keys(n: int, universe: int, s: float = 1.1, seed: int = 0):
+    """n keys drawn from a Zipf(s) distribution over range(universe)."""
+    rng = random.Random(seed)
+    weights = [1 / (rank ** s) for rank in range(1, universe + 1)]
+    return rng.choices(range(universe), weights=weights, k=n)
+
+
+def benchmark_concurrent(capacity=10_000, ops_per_thread=50_000, thread_counts=(1, 2, 4, 8),
+                         shard_counts=(1, 4, 16, 64)):
+    """ops/sec of a get-then-put-on-miss workload vs. thread count and shard count."""
+    keys = zipf_keys(ops_per_thread, capacity * 10)
+
+    def run(cache, threads):
+        def worker():
+            for key in keys:
+                if cache.get(key) == -1:
+                    cache.put(key, key)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return threads * len(keys) / (time.perf_counter() - start)
+
+    for threads in thread_counts:
+        print(f"threads={threads}")
+        print(f"  global lock            {run(GlobalLockLFUCache(capacity), threads):>12,.0f} ops/s")
+        for shards in shard_counts:
+            for approximate in (False, True):
+                cache = ConcurrentLFUCache(capacity, num_shards=shards, approximate_global_eviction=approximate)
+                mode = "global" if approximate else "local"
+                print(f"  shards={shards:<3} {mode:<6}     {run(cache, threads):>12,.0f} ops/s")
+
+
+def benchmark_compact(entries=1_000_000, ops=1_000_000):
+    """Memory per entry and ops/sec of CompactLFUCache vs. LFUCache on the same trace."""
+    for cls in (LFUCache, CompactLFUCache):
+        tracemalloc.start()
+        cache = cls(entries)
+        for key in range(entries):
+            cache.put(key, key)
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Includes the int key itself, which is also used as the value
+        print(f"{cls.__name__:<16} {used / entries:6.1f} bytes/entry")
+
+    trace = zipf_keys(ops, entries * 2)
+    hits = {}
+    for cls in (LFUCache, CompactLFUCache):
+        cache = cls(entries // 10)
+        start = time.perf_counter()
+        hit_sequence = []
+        for key in trace:
+            hit = cache.get(key) != -1
+            if not hit:
+                cache.put(key, key)
+            hit_sequence.append(hit)
+        elapsed = time.perf_counter() - start
+        hits[cls] = hit_sequence
+        print(f"{cls.__name__:<16} {ops / elapsed:>12,.0f} ops/s  hit ratio {sum(hit_sequence) / ops:.3f}")
+    assert hits[LFUCache] == hits[CompactLFUCache], "eviction order differs"
+
+
+def hit_ratio(cache, trace) -> float:
+    hits = 0
+    for key in trace:
+        if cache.get(key) != -1:
+            hits += 1
+        else:
+            cache.put(key, key)
+    return hits / len(trace)
+
+
+def scan_heavy_keys(n: int, universe: int, scan_every: int = 5_000, scan_length: int = 5_000, seed: int = 0):
+    """A Zipf trace interrupted by scans of keys that are never requested again."""
+    trace = []
+    next_scan_key = universe
+    for i, key in enumerate(zipf_keys(n, universe, seed=seed)):
+        trace.append(key)
+        if (i + 1) % scan_every == 0:
+            trace.extend(range(next_scan_key, next_scan_key + scan_length))
+            next_scan_key += scan_length
+    return trace
+
+
+def benchmark_tinylfu(capacity=1_000, ops=200_000, universe=100_000):
+    traces = {
+        "zipf": zipf_keys(ops, universe),
+        "zipf + scans": scan_heavy_keys(ops, universe),
+    }
+    for name, trace in traces.items():
+        print(f"{name}")
+        for cls in (LFUCache, TinyLFUCache):
+            print(f"  {cls.__name__:<16} hit ratio {hit_ratio(cls(capacity), trace):.3f}")
+
+
+def drifting_keys(phases=10, ops_per_phase=50_000, hot_set=2_000, universe=1_000_000, seed=0):
+    """Zipf traffic over a hot set that moves to brand new keys at every phase."""
+    rng = random.Random(seed)
+    trace = []
+    for phase in range(phases):
+        offset = rng.randrange(universe)
+        trace.extend(offset + key for key in zipf_keys(ops_per_phase, hot_set, seed=seed + phase))
+    return trace
+
+
+def benchmark_decay(capacity=1_000, window=25_000):
+    """Hit ratio per window of operations while the hot set drifts."""
+    trace = drifting_keys()
+    caches = {
+        "LFUCache": LFUCache(capacity),
+        "Decaying (ops)": DecayingLFUCache(capacity, decay_every_ops=10 * capacity),
+        "TinyLFUCache": TinyLFUCache(capacity),
+    }
+    print("ops        " + "".join(f"{name:>16}" for name in caches))
+    for start in range(0, len(trace), window):
+        chunk = trace[start:start + window]
+        ratios = [hit_ratio(cache, chunk) for cache in caches.values()]
+        print(f"{start + window:<10} " + "".join(f"{ratio:>16.3f}" for ratio in ratios))
+
+
+def test_ttl_and_weight():
+    now = [0.0]
+    cache = ExpiringLFUCache(100, default_ttl=10, weigher=len, clock=lambda: now[0])
+
+    cache.put("a", b"x" * 40)
+    cache.put("b", b"x" * 40, ttl=30)
+    cache.get("a")
+    # 40 + 40 + 30 > 100: "b" (lower frequency) is evicted to make room
+    cache.put("c", b"x" * 30)
+    assert cache.get("b") == -1 and cache.total_weight == 70
+
+    now[0] = 10.5
+    assert cache.get("a") == -1, "a expired"
+    assert cache.get("c") == -1, "c expired"
+    assert len(cache) == 0 and cache.total_weight == 0
+
+    cache.put("big", b"x" * 101)
+    assert cache.get("big") == -1, "heavier than the whole budget"
+
+    # Growing a key can evict that key itself; it must not stay on the wheel
+    cache.put("a", b"x" * 40)
+    cache.put("b", b"x" * 40)
+    for _ in range(5):
+        cache.get("b")
+    cache.put("a", b"x" * 70, ttl=5)
+    assert cache.get("a") == -1 and cache.total_weight == 40
+    now[0] += 20
+    assert cache.get("b") == -1 and len(cache) == 0 and cache.total_weight == 0
+
+    # Many short-lived entries are reclaimed by the wheel without being read again
+    for i in range(1000):
+        now[0] += 0.01
+        cache.put(i, b"x", ttl=1)
+    now[0] += 2
+    cache.get("anything")
+    assert len(cache) == 0
+    print("TTL and weight test passed")
+
+
+def test_global_eviction_capacity(capacity=100):
+    """With approximate_global_eviction the cache fills to exactly capacity, whatever the shard count."""
+    for shards in (1, 4, 16):
+        cache = ConcurrentLFUCache(capacity, num_shards=shards, approximate_global_eviction=True)
+        for key in range(capacity * 5):
+            cache.put(key, key)
+        assert len(cache) == cache.size == capacity, (shards, len(cache), cache.size)
+        cache.put_many((key, key) for key in range(capacity * 5, capacity * 7))
+        assert len(cache) == cache.size == capacity, (shards, len(cache), cache.size)
+
+    # Fewer entries than the default 16 segments: every key must still be cacheable
+    loads = []
+
+    @lfu_cached(capacity=8)
+    def load(key):
+        loads.append(key)
+        return key
+
+    for _ in range(3):
+        for key in range(8):
+            load(key)
+    assert len(loads) == 8, f"loader ran {len(loads)} times"
+    print("Global eviction capacity test passed")
+
+
+def test_single_flight(callers=20):
+    calls = []
+
+    def slow_square(key):
+        calls.append(key)
+        time.sleep(0.2)
+        return key * key
+
+    cache = LoadingLFUCache(100)
+    threads = [threading.Thread(target=cache.get_or_load, args=(7, slow_square)) for _ in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [7], f"loader ran {len(calls)} times"
+    assert cache.get_or_load(7, slow_square) == 49
+    print(f"sync:  {cache.stats()}")
+
+    @lfu_cached(capacity=100)
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.2)
+        return key * 2
+
+    async def main():
+        return await asyncio.gather(*(fetch(21) for _ in range(callers)))
+
+    calls.clear()
+    assert asyncio.run(main()) == [42] * callers
+    assert calls == [21]
+    print(f"async: {fetch.cache.stats()}")
+
+    @lfu_cached(capacity=100)
+    def pair(*args, **kwargs):
+        return args, kwargs
+
+    # A tuple passed positionally must not hit the entry of the same keyword argument
+    assert pair(1, ("x", 2)) == ((1, ("x", 2)), {})
+    assert pair(1, x=2) == ((1,), {"x": 2})
+    print("Single-flight test passed")
+
+
+def benchmark_batches(capacity=10_000, total_keys=200_000, batch_sizes=(1, 10, 100, 1000)):
+    """Per-key cost of get() in a loop vs. get_many() for several batch sizes."""
+    keys = zipf_keys(total_keys, capacity * 2)
+    for make_cache in (lambda: LFUCache(capacity), lambda: ConcurrentLFUCache(capacity)):
+        cache = make_cache()
+        cache.put_many((key, key) for key in range(capacity))
+        name = type(cache).__name__
+        for batch_size in batch_sizes:
+            batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+
+            start = time.perf_counter()
+            for batch in batches:
+                for key in batch:
+                    cache.get(key)
+            single = (time.perf_counter() - start) / total_keys
+
+            start = time.perf_counter()
+            for batch in batches:
+                cache.get_many(batch)
+            batched = (time.perf_counter() - start) / total_keys
+            print(f"{name:<20} batch={batch_size:<5} get: {single * 1e9:6.0f} ns/key  "
+                  f"get_many: {batched * 1e9:6.0f} ns/key")
+
+
+def _shared_worker(cache, worker_id, ops, universe, results):
+    # A private cache per process when cache is None, otherwise the shared one
+    local = LFUCache(results["capacity"]) if cache is None else None
+    keys = zipf_keys(ops, universe, seed=worker_id)
+    hits = 0
+    start = time.perf_counter()
+    for key in keys:
+        encoded = str(key).encode()
+        if local is not None:
+            hit = local.get(encoded) != -1
+            if not hit:
+                local.put(encoded, encoded)
+        else:
+            hit = cache.get(encoded) != -1
+            if not hit:
+                cache.put(encoded, encoded)
+        hits += hit
+    results["queue"].put((hits, ops, time.perf_counter() - start))
+
+
+def test_shared_memory_churn(capacity=2_000, rounds=10, ops_per_round=4_000):
+    """
+    Random keys from a universe much larger than the cache keep it evicting. The table
+    must never fill with dead slots, and throughput must stay flat from round to round.
+    """
+    cache = SharedMemoryLFUCache(capacity, max_value_size=16)
+    rng = random.Random(0)
+    rates = []
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(ops_per_round):
+                key = str(rng.randrange(capacity * 100)).encode()
+                if cache.get(key) == -1:
+                    cache.put(key, key)
+            rates.append(ops_per_round / (time.perf_counter() - start))
+            states = cache.slot_states()
+            assert set(states) <= {cache.EMPTY, cache.OCCUPIED}, states
+            assert states[cache.OCCUPIED] == len(cache) == capacity, states
+        # Every key still reachable after all the shifting
+        for i in range(cache.table_size):
+            offset = cache._offset(i)
+            if cache.shm.buf[offset] == cache.OCCUPIED:
+                key = cache._slot_key(offset, cache.SLOT.unpack_from(cache.shm.buf, offset)[3])
+                assert cache._find(key)[0] == i
+        assert min(rates[1:]) > rates[0] / 3, rates
+        print(f"Shared memory churn test passed: {rates[0]:,.0f} -> {rates[-1]:,.0f} ops/s")
+    finally:
+        cache.close()
+
+
+def _spawned_worker(cache, key):
+    cache.put(key, cache.get(key) + b" and child")
+    cache.close()
+
+
+def test_shared_memory_spawn():
+    """A spawned child attaches to the segment by name, and leaves its cleanup to the parent."""
+    ctx = multiprocessing.get_context("spawn")
+    cache = SharedMemoryLFUCache(100, context=ctx)
+    try:
+        cache.put(b"key", b"parent")
+        child = ctx.Process(target=_spawned_worker, args=(cache, b"key"))
+        child.start()
+        child.join()
+        assert child.exitcode == 0
+        assert cache.get(b"key") == b"parent and child"
+    finally:
+        cache.close()
+    print("Shared memory spawn test passed")
+
+
+def benchmark_shared_memory(processes=4, capacity=5_000, ops=50_000, universe=50_000):
+    """Per-process LFUCache (capacity each) vs. one SharedMemoryLFUCache of the same total size."""
+    ctx = multiprocessing.get_context("fork")
+    for label in ("per-process", "shared"):
+        cache = SharedMemoryLFUCache(capacity * processes, max_value_size=16) if label == "shared" else None
+        results = {"capacity": capacity, "queue": ctx.Queue()}
+        workers = [ctx.Process(target=_shared_worker, args=(cache, i, ops, universe, results))
+                   for i in range(processes)]
+        for w in workers:
+            w.start()
+        outcomes = [results["queue"].get() for _ in workers]
+        for w in workers:
+            w.join()
+        hits = sum(o[0] for o in outcomes)
+        total = sum(o[1] for o in outcomes)
+        ops_per_sec = sum(o[1] / o[2] for o in outcomes)
+        print(f"{label:<12} hit ratio {hits / total:.3f}  {ops_per_sec:>10,.0f} ops/s across {processes} processes")
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    test_ttl_and_weight()
+    test_global_eviction_capacity()
+    test_single_flight()
+    test_shared_memory_churn()
+    test_shared_memory_spawn()
+    benchmark_concurrent()
+    benchmark_compact()
+    benchmark_tinylfu()
+    benchmark_decay()
+    benchmark_batches()
+    benchmark_shared_memory()
@@ -0,0 +1,172 @@
+"""
+Persistent crawl cache, so a re-crawl skips what has not changed since the last one.
+
+For every URL the cache keeps the ETag and Last-Modified validators, a SHA-256 of the
+body, a 64-bit simhash of the visible text and the extracted outlinks, in SQLite. On
+the next crawl:
+
+- conditional_headers() turns the validators into If-None-Match / If-Modified-Since;
+  a 304 reply means the stored outlinks are reused and no body is transferred.
+- lookup() reuses the stored outlinks when a downloaded body has the same content hash
+  (server without validators), or a simhash within `max_distance` bits of this URL's
+  previous version (near-duplicate), so it is not parsed. The simhash is only computed
+  here when there is such a version to compare with; otherwise the parse stage does it.
+
+Only a URL's own previous version is matched: a near-duplicate at another URL, e.g.
+/list?page=3 next to /list?page=2, shares its template but not its outlinks, and
+reusing them would cut the crawl short.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from visited_sets import from_sqlite, to_sqlite
+
+_TAG = re.compile(r"<[^>]*>")
+_WORD = re.compile(r"\w+")
+_LANE = 32
+# Byte value -> its 8 bits, each in its own _LANE-bit lane, so bit counts add up lane-wise
+_SPREAD = [sum(1 << (bit * _LANE) for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def simhash(html):
+    """
+    64-bit simhash of the distinct words of html's text. Words are not weighted by count,
+    so words a site's template repeats on every page do not drown out the content.
+    Bit i is set when more than half of the word hashes have it set. The bits are counted
+    per byte of the hashes: a Counter of byte values, then one lane-wise sum over at most
+    256 values, instead of 64 Python steps per word.
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    words = set(_WORD.findall(_TAG.sub(" ", html).lower()))
+    digests = b"".join([hashlib.blake2b(word.encode(), digest_size=8).digest() for word in words])
+    result = 0
+    for byte in range(8):
+        lanes = sum(count * _SPREAD[value] for value, count in Counter(digests[byte::8]).items())
+        for bit in range(8):
+            if 2 * (lanes >> (bit * _LANE) & ((1 << _LANE) - 1)) > len(words):
+                result |= 1 << (byte * 8 + bit)
+    return result
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class CrawlCache:
+    def __init__(self, path, max_distance=3, commit_every=100):
+        self.max_distance = max_distance
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        self.stats = Counter()
+        # Shared by every fetch thread, which is why all access goes through self.lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT,"
+            " simhash INTEGER, outlinks TEXT)"
+        )
+        self.conn.commit()
+
+    def conditional_headers(self, url):
+        with self.lock:
+            row = self.conn.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def not_modified(self, url):
+        """Stored outlinks of url, after the server answered 304 Not Modified."""
+        with self.lock:
+            self.stats["not_modified"] += 1
+            row = self.conn.execute("SELECT outlinks FROM pages WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def lookup(self, url, content_hash, html):
+        """
+        (outlinks, simhash) for a downloaded body: the outlinks to reuse, or None if it has
+        to be parsed, and the simhash to save with it, or None if it was not needed to
+        decide. When the outlinks are reused, that is the simhash of the version they were
+        parsed from, so small edits are measured against it and can't add up unnoticed.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content_hash, simhash, outlinks FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row and row[0] == content_hash:
+                self.stats["unchanged"] += 1
+                return json.loads(row[2]), from_sqlite(row[1])
+            if not row:
+                self.stats["parsed"] += 1
+                return None, None
+        sh = simhash(html)  # outside the lock: other fetch threads keep using the cache
+        with self.lock:
+            if hamming(from_sqlite(row[1]), sh) <= self.max_distance:
+                self.stats["near_duplicate"] += 1
+                return json.loads(row[2]), from_sqlite(row[1])
+            self.stats["parsed"] += 1
+            return None, sh
+
+    def save(self, url, outlinks, etag=None, last_modified=None, content_hash=None, simhash=0):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, to_sqlite(simhash), json.dumps(outlinks)),
+            )
+            self.uncommitted += 1
+            if self.uncommitted >= self.commit_every:
+                self.conn.commit()
+                self.uncommitted = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+def test_near_duplicate_lookup(path=":memory:"):
+    """A page a few words away from its previous version reuses its outlinks; another URL's don't."""
+    text = " ".join(f"word{i}" for i in range(200))
+    cache = CrawlCache(path)
+    cache.save("http://a/list?page=2", ["http://a/x"], content_hash="h1", simhash=simhash(text))
+    assert hamming(simhash(text), simhash(text + " extra")) <= cache.max_distance
+    assert cache.lookup("http://a/list?page=2", "h1", text) == (["http://a/x"], simhash(text))
+    assert cache.lookup("http://a/list?page=2", "h2", text + " extra") == (["http://a/x"], simhash(text))
+    assert cache.lookup("http://a/list?page=2", "h3", "something else entirely")[0] is None
+    assert cache.lookup("http://a/list?page=3", "h4", text + " extra") == (None, None)
+    assert cache.stats == Counter(unchanged=1, near_duplicate=1, parsed=2)
+    cache.close()
+
+
+def test_edits_add_up(path=":memory:", edits=20):
+    """One word changed per crawl: once the page has drifted from its parsed version, it is parsed again."""
+    words = [f"word{i}" for i in range(200)]
+    cache = CrawlCache(path)
+    parsed_words = list(words)
+    cache.save("http://a/", [], content_hash="0", simhash=simhash(" ".join(words)))
+    for edit in range(1, edits + 1):
+        words[edit] = f"edited{edit}"
+        html = " ".join(words)
+        links, sh = cache.lookup("http://a/", str(edit), html)
+        if links is None:
+            links, sh, parsed_words = [], simhash(html), list(words)
+        cache.save("http://a/", links, content_hash=str(edit), simhash=sh)
+        # Never reused once the page is further than max_distance from the last parsed version
+        drift = hamming(simhash(" ".join(parsed_words)), simhash(html))
+        assert drift <= cache.max_distance, (edit, drift)
+    assert cache.stats["parsed"] >= 2, cache.stats
+    cache.close()
+
+
+if __name__ == "__main__":
+    test_near_duplicate_lookup()
+    test_edits_add_up()
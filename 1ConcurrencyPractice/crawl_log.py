@@ -0,0 +1,95 @@
+"""
+Append-only checkpoint log of a crawl's frontier and visited state, so a crashed crawl
+resumes where it stopped instead of from the seed.
+
+One tab-separated line per event, written through to the OS as it happens and fsynced
+at most every `fsync_interval` seconds:
+
+    F <depth> <inlinks> <url>   url was added to the frontier
+    V <url>                     a fetch of url started
+    D <url>                     url was fetched and its links were logged
+
+A page's F records precede its D record, so every prefix of the log is a consistent
+state; a torn last line is ignored. On startup replay() rebuilds the visited set (D) and
+the frontier (F minus D); URLs with a V but no D were in flight and get fetched again.
+It then compacts the log to the D records plus one F record per queued URL.
+"""
+import os
+import threading
+import time
+
+
+class CrawlLog:
+    def __init__(self, path, fsync_interval=1.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.synced = 0.0
+
+    def replay(self, visited):
+        """
+        Adds every done URL to visited (which should start empty) and returns (frontier,
+        in_flight): frontier maps each queued URL to [depth, inlinks], in_flight lists the
+        queued URLs whose fetch had started. Then opens the compacted log for appending.
+        """
+        frontier = {}
+        in_flight = set()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8", errors="replace") as log:
+                    for line in log:
+                        if not line.endswith("\n"):
+                            break  # torn write at the crash
+                        kind, _, rest = line[:-1].partition("\t")
+                        if kind == "F":
+                            depth, inlinks, url = rest.split("\t", 2)
+                            if url not in visited:
+                                entry = frontier.setdefault(url, [int(depth), 0])
+                                entry[0] = min(entry[0], int(depth))
+                                entry[1] += int(inlinks)
+                        elif kind == "V":
+                            in_flight.add(rest)
+                        elif kind == "D":
+                            in_flight.discard(rest)
+                            frontier.pop(rest, None)
+                            if rest not in visited:
+                                visited.add(rest)
+                                out.write(line)
+                        else:
+                            break  # unwritten tail after an OS crash
+            for url, (depth, inlinks) in frontier.items():
+                out.write(f"F\t{depth}\t{inlinks}\t{url}\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.path)
+        # Line buffered: every record reaches the OS at once, so a killed process loses nothing
+        self.file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self.synced = time.monotonic()
+        return frontier, sorted(in_flight & frontier.keys())
+
+    def _append(self, line):
+        with self.lock:
+            self.file.write(line)
+            now = time.monotonic()
+            if now - self.synced < self.fsync_interval:
+                return
+            self.synced = now
+            fd = self.file.fileno()
+        os.fsync(fd)  # outside the lock, so other threads keep logging meanwhile
+
+    def queued(self, url, depth):
+        self._append(f"F\t{depth}\t1\t{url}\n")
+
+    def claimed(self, url):
+        self._append(f"V\t{url}\n")
+
+    def done(self, url):
+        self._append(f"D\t{url}\n")
+
+    def close(self):
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
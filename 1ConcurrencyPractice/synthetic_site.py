@@ -0,0 +1,206 @@
+"""
+Local stand-in web site for crawler tests and benchmarks.
+
+Serves a synthetic link graph of `pages` HTML pages at /page/<n>. Page n always links
+to page n + 1, so every page is reachable from /page/0, plus `links_per_page` random
+other pages, after a random sentence of its own and `filler` paragraphs of markup that make pages costlier to parse.
+Responses can be delayed by `latency` seconds to mimic a remote server.
+The server speaks HTTP/1.1 with Content-Length, so clients can keep connections alive;
+it counts requests and new TCP connections to show whether a client pools them, and
+records request times and peak concurrency to check a client's politeness limits.
+With `validators`, pages carry an ETag and Last-Modified and conditional requests for
+an unchanged page get 304 Not Modified; edit() changes a page to simulate a re-crawl.
+crawl_site() and quiet_crawl() are the harness the crawler tests and benchmarks share.
+"""
+import contextlib
+import io
+import random
+import sys
+import threading
+import time
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Large crawls open many connections at once
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients that are killed or time out mid-request are expected; report anything else
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class SyntheticSite:
+    def __init__(self, pages=1000, links_per_page=10, latency=0.0, seed=0, filler=0, validators=True):
+        self.pages = pages
+        self.latency = latency
+        self.filler = filler
+        self.validators = validators
+        self.edits = {}
+        self.modified = {}
+        self.created = int(time.time())
+        rng = random.Random(seed)
+        self.links = [
+            sorted({(n + 1) % pages} | {rng.randrange(pages) for _ in range(links_per_page)})
+            for n in range(pages)
+        ]
+        vocabulary = [f"{a}{b}{c}" for a in ("ka", "lo", "mi", "ne", "ru", "ta") for b in ("ber", "dan", "gor", "lis", "mon")
+                      for c in ("a", "el", "ix", "on", "us")]
+        self.sentences = [" ".join(rng.choices(vocabulary, k=30)) for _ in range(pages)]
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.request_times = []
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.server = None
+        self.thread = None
+
+    def render(self, n):
+        links = "".join(f'<li><a href="/page/{target}">page {target}</a></li>' for target in self.links[n])
+        filler = "".join(
+            f'<p class="text">Paragraph {i} of page {n}, with <b>bold</b>, <i>italic</i> and <span>inline</span> text.</p>'
+            for i in range(self.filler)
+        )
+        edit = f"<p>{self.edits[n]}</p>" if n in self.edits else ""
+        return f"<html><head><title>Page {n}</title></head><body><h1>Page {n}</h1><p>{self.sentences[n]}</p>{filler}{edit}<ul>{links}</ul></body></html>"
+
+    def edit(self, n, text):
+        """Adds a paragraph of text to page n (replacing an earlier edit)."""
+        with self.lock:
+            self.edits[n] = text
+            self.modified[n] = int(time.time())
+
+    def make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with site.lock:
+                    site.connections += 1
+
+            def do_GET(self):
+                with site.lock:
+                    site.requests += 1
+                    site.request_times.append(time.monotonic())
+                    site.active += 1
+                    site.max_active = max(site.max_active, site.active)
+                try:
+                    self.respond()
+                finally:
+                    with site.lock:
+                        site.active -= 1
+
+            def respond(self):
+                if site.latency:
+                    time.sleep(site.latency)
+                try:
+                    n = int(self.path.rsplit("/", 1)[-1]) if self.path.startswith("/page/") else -1
+                except ValueError:
+                    n = -1
+                if not 0 <= n < site.pages:
+                    self.send_error(404)
+                    return
+                body = site.render(n).encode()
+                if site.validators:
+                    etag = f'"{zlib.crc32(body):08x}"'
+                    modified = site.modified.get(n, site.created)
+                    if self.not_modified(etag, modified):
+                        with site.lock:
+                            site.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if site.validators:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", formatdate(modified, usegmt=True))
+                self.end_headers()
+                self.wfile.write(body)
+                with site.lock:
+                    site.bytes_sent += len(body)
+
+            def not_modified(self, etag, modified):
+                # If-None-Match takes precedence over If-Modified-Since (RFC 9110, 13.2.2)
+                if "If-None-Match" in self.headers:
+                    return etag in [tag.strip() for tag in self.headers["If-None-Match"].split(",")]
+                if "If-Modified-Since" in self.headers:
+                    try:
+                        return parsedate_to_datetime(self.headers["If-Modified-Since"]).timestamp() >= modified
+                    except (TypeError, ValueError):
+                        return False
+                return False
+
+            def log_message(self, format, *args):
+                pass  # keep benchmark output readable
+
+        return Handler
+
+    def start(self):
+        self.server = _Server(("127.0.0.1", 0), self.make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/page/0"
+
+    def peak_rate(self, window=1.0):
+        """Most requests received within any `window` seconds."""
+        times = self.request_times
+        peak = lo = 0
+        for hi, t in enumerate(times):
+            while t - times[lo] > window:
+                lo += 1
+            peak = max(peak, hi - lo + 1)
+        return peak
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def quiet_crawl(crawl):
+    """Runs crawl() with the crawler's per-page output discarded; returns the seconds it took."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        crawl()
+    return time.perf_counter() - start
+
+
+def crawl_site(make_crawler, crawl=lambda crawler: crawler.crawl(), **site_options):
+    """
+    Serves a SyntheticSite(**site_options), crawls it quietly with crawl(make_crawler(base_url))
+    and returns (site, crawler, seconds the crawl took).
+    """
+    with SyntheticSite(**site_options) as site:
+        crawler = make_crawler(site.base_url)
+        elapsed = quiet_crawl(lambda: crawl(crawler))
+    return site, crawler, elapsed
+
+
+if __name__ == "__main__":
+    with SyntheticSite(pages=10) as site:
+        print(f"Serving synthetic site at {site.base_url}")
+        print(site.render(0))
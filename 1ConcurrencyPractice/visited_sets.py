@@ -0,0 +1,289 @@
+"""
+Visited-URL sets for the crawlers, in place of a Python set of URL strings (100+ bytes
+per URL). Every backend supports `url in s`, `s.add(url)` and `len(s)`, so any of them
+can be passed as WebCrawler(visited=...). None is thread-safe on its own; the crawler
+guards `visited` with its lock.
+
+- FingerprintSet: 64-bit URL hashes in an open-addressing array, 16-32 bytes per URL.
+  Two URLs collide with probability about n^2 / 2^65, i.e. never in practice.
+- ScalableBloomFilter: a few bits per URL, with a configurable false-positive rate that
+  holds however many URLs are added. A false positive skips an unseen URL.
+- DiskSpillSet: recent fingerprints in memory, the rest in SQLite behind a bloom filter,
+  so memory stays bounded and lookups of unseen URLs rarely touch the disk.
+"""
+import hashlib
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from array import array
+
+
+def fingerprint(url):
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "little")
+
+
+class FingerprintSet:
+    def __init__(self, capacity=1024):
+        size = 8
+        while size < capacity * 2:
+            size <<= 1
+        self.table = array("Q", bytes(8 * size))  # 0 marks an empty slot
+        self.mask = size - 1
+        self.count = 0
+
+    def _slot(self, fp):
+        table, mask = self.table, self.mask
+        i = fp & mask
+        while True:
+            v = table[i]
+            if v == 0 or v == fp:
+                return i
+            i = (i + 1) & mask
+
+    def add_fingerprint(self, fp):
+        """Returns False if fp was already present."""
+        fp = fp or 1
+        i = self._slot(fp)
+        if self.table[i] == fp:
+            return False
+        self.table[i] = fp
+        self.count += 1
+        if self.count * 2 > len(self.table):  # keep probes short: load factor <= 1/2
+            self._resize(len(self.table) * 2)
+        return True
+
+    def contains_fingerprint(self, fp):
+        return self.table[self._slot(fp or 1)] != 0
+
+    def _resize(self, size):
+        old = self.table
+        self.table = array("Q", bytes(8 * size))
+        self.mask = size - 1
+        for fp in old:
+            if fp:
+                self.table[self._slot(fp)] = fp
+
+    def fingerprints(self):
+        return (fp for fp in self.table if fp)
+
+    def add(self, url):
+        return self.add_fingerprint(fingerprint(url))
+
+    def __contains__(self, url):
+        return self.contains_fingerprint(fingerprint(url))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return len(self.table) * self.table.itemsize
+
+
+class BloomFilter:
+    """Fixed-size bloom filter sized for `capacity` items at `error_rate`."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, fp):
+        # Double hashing: k positions from the two halves of one 64-bit fingerprint
+        h1, h2 = fp, (fp >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add_fingerprint(self, fp):
+        for pos in self._positions(fp):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains_fingerprint(self, fp):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fp))
+
+
+class ScalableBloomFilter:
+    """
+    Chain of bloom filters. When the newest one holds its capacity, a new one `growth`
+    times larger is started with its error rate multiplied by `tightening`; the rates
+    form a geometric series bounded by `error_rate`, so the overall false-positive rate
+    holds without knowing the final URL count.
+    """
+
+    def __init__(self, initial_capacity=1 << 16, error_rate=0.001, growth=2, tightening=0.5):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+
+    def add_fingerprint(self, fp):
+        """Returns False if fp was (or falsely appears to be) already present."""
+        if self.contains_fingerprint(fp):
+            return False
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            i = len(self.filters)
+            self.filters.append(BloomFilter(
+                self.initial_capacity * self.growth ** i,
+                self.error_rate * (1 - self.tightening) * self.tightening ** i,
+            ))
+        self.filters[-1].add_fingerprint(fp)
+        return True
+
+    def contains_fingerprint(self, fp):
+        return any(f.contains_fingerprint(fp) for f in self.filters)
+
+    def add(self, url):
+        return self.add_fingerprint(fingerprint(url))
+
+    def __contains__(self, url):
+        return self.contains_fingerprint(fingerprint(url))
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    @property
+    def nbytes(self):
+        return sum(len(f.bits) for f in self.filters)
+
+
+def to_sqlite(value):
+    """An unsigned 64-bit hash as the signed 64-bit integer SQLite stores."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def from_sqlite(value):
+    """Inverse of to_sqlite()."""
+    return value & ((1 << 64) - 1)
+
+
+class DiskSpillSet:
+    """
+    Exact fingerprint set with bounded memory. New fingerprints go to an in-memory
+    FingerprintSet; once it holds `memory_limit` of them they are written to a SQLite
+    table in one transaction and added to a bloom filter of spilled fingerprints, which
+    answers most lookups of unseen URLs without a query. Reopening the same path
+    continues the set.
+    """
+
+    def __init__(self, path, memory_limit=1 << 16, error_rate=0.01):
+        self.path = path
+        self.memory_limit = memory_limit
+        # Callers serialize access (the crawler holds its lock), from any of its threads
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS visited (fp INTEGER PRIMARY KEY)")
+        self.conn.commit()
+        self.hot = FingerprintSet(memory_limit)
+        self.spilled = ScalableBloomFilter(error_rate=error_rate)
+        self.count = 0
+        for (fp,) in self.conn.execute("SELECT fp FROM visited"):
+            self.spilled.add_fingerprint(from_sqlite(fp))
+            self.count += 1
+
+    def contains_fingerprint(self, fp):
+        if self.hot.contains_fingerprint(fp):
+            return True
+        if not self.spilled.contains_fingerprint(fp):
+            return False
+        return self.conn.execute("SELECT 1 FROM visited WHERE fp = ?", (to_sqlite(fp),)).fetchone() is not None
+
+    def add_fingerprint(self, fp):
+        if self.contains_fingerprint(fp):
+            return False
+        self.hot.add_fingerprint(fp)
+        self.count += 1
+        if len(self.hot) >= self.memory_limit:
+            self.spill()
+        return True
+
+    def spill(self):
+        fps = list(self.hot.fingerprints())
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO visited VALUES (?)", ((to_sqlite(fp),) for fp in fps))
+        for fp in fps:
+            self.spilled.add_fingerprint(fp)
+        self.hot = FingerprintSet(self.memory_limit)
+
+    def close(self):
+        self.spill()
+        self.conn.close()
+
+    def add(self, url):
+        return self.add_fingerprint(fingerprint(url))
+
+    def __contains__(self, url):
+        return self.contains_fingerprint(fingerprint(url))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.hot.nbytes + self.spilled.nbytes
+
+    @property
+    def disk_bytes(self):
+        return os.path.getsize(self.path)
+
+
+def _set_nbytes(s):
+    return sys.getsizeof(s) + sum(sys.getsizeof(url) for url in s)
+
+
+def benchmark_visited_sets(n=200_000):
+    """Memory per URL and insert/lookup throughput of each backend, n URLs over 1000 hosts."""
+    urls = [f"https://host{i % 1000}.example.com/articles/{i}/index.html" for i in range(n)]
+    unseen = [f"https://host{i % 1000}.example.com/articles/{i}/other.html" for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            ("set", set(), _set_nbytes),
+            ("fingerprint", FingerprintSet(), lambda s: s.nbytes),
+            ("bloom 0.1%", ScalableBloomFilter(error_rate=0.001), lambda s: s.nbytes),
+            ("disk spill", DiskSpillSet(os.path.join(tmp, "visited.db"), memory_limit=n // 10), lambda s: s.nbytes),
+        ]
+        print(f"{'backend':<12} {'bytes/URL':>9} {'disk B/URL':>10} {'adds/s':>10} {'lookups/s':>10} {'false pos':>9}")
+        for name, s, nbytes in backends:
+            start = time.perf_counter()
+            for url in urls:
+                s.add(url)
+            add_rate = n / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            hits = sum(url in s for url in urls)
+            false_pos = sum(url in s for url in unseen)
+            lookup_rate = 2 * n / (time.perf_counter() - start)
+
+            assert hits == n
+            disk = f"{s.disk_bytes / n:10.1f}" if isinstance(s, DiskSpillSet) else f"{'-':>10}"
+            print(f"{name:<12} {nbytes(s) / n:9.1f} {disk} {add_rate:10.0f} {lookup_rate:10.0f} {false_pos / n:9.4%}")
+            if isinstance(s, DiskSpillSet):
+                s.close()
+
+
+def test_crawl_with_backends(pages=300):
+    """Each backend plugged into the v1 crawler still crawls the whole synthetic site."""
+    from synthetic_site import crawl_site
+    from web_crawler_v1 import WebCrawler
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for visited in (FingerprintSet(), ScalableBloomFilter(),
+                        DiskSpillSet(os.path.join(tmp, "visited.db"), memory_limit=50)):
+            site, _, _ = crawl_site(lambda url: WebCrawler(url, max_workers=8, visited=visited), pages=pages)
+            assert site.requests == pages, (type(visited).__name__, site.requests)
+            if isinstance(visited, DiskSpillSet):
+                visited.close()
+                # Reopened, the spilled set still knows every page
+                reopened = DiskSpillSet(visited.path)
+                assert len(reopened) == pages and site.base_url in reopened
+                reopened.close()
+
+
+if __name__ == "__main__":
+    test_crawl_with_backends()
+    benchmark_visited_sets()
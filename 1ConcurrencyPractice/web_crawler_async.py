@@ -0,0 +1,117 @@
+import asyncio
+import sys
+import aiohttp
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin, urlparse
+
+
+class AsyncWebCrawler:
+    """
+    Single-threaded crawler: thousands of fetches in flight as coroutines instead of one
+    blocked thread per request. All fetches go through one aiohttp session, whose
+    connector keeps connections alive and caps them globally (max_concurrency) and per
+    host (limit_per_host), so a page reuses an open TCP/TLS connection where possible.
+    """
+
+    def __init__(self, base_url, max_concurrency=500, limit_per_host=100, verbose=True):
+        self.base_url = base_url
+        self.base_netloc = urlparse(base_url).netloc
+        self.visited = set()
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.verbose = verbose
+        self.errors = 0
+
+    async def crawl(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.limit_per_host)
+        timeout = aiohttp.ClientTimeout(total=5)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            self.queue = asyncio.Queue()
+            # URLs are marked visited when queued; the event loop is the only writer, so no lock
+            self.visited.add(self.base_url)
+            self.queue.put_nowait(self.base_url)
+
+            workers = [asyncio.create_task(self.worker(session)) for _ in range(self.max_concurrency)]
+            # join() returns once every queued URL, including those queued while fetching,
+            # has been processed
+            await self.queue.join()
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def worker(self, session):
+        while True:
+            url = await self.queue.get()
+            try:
+                await self.fetch(session, url)
+            except Exception as e:
+                # Any other per-URL error (e.g. UnicodeDecodeError from response.text())
+                # must not end the worker, or concurrency silently shrinks
+                self.errors += 1
+                print(f"Error crawling {url}: {e!r}", file=sys.stderr)
+            finally:
+                self.queue.task_done()
+
+    async def fetch(self, session, url):
+        if self.verbose:
+            print(f"Crawling: {url}")
+        try:
+            async with session.get(url) as response:
+                if "text/html" not in response.headers.get("Content-Type", ""):
+                    return
+                html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return
+
+        soup = BeautifulSoup(html, "html.parser")
+        for link in soup.find_all("a", href=True):
+            full_url = urljoin(url, link["href"])
+            if self.is_valid_url(full_url) and full_url not in self.visited:
+                self.visited.add(full_url)
+                self.queue.put_nowait(full_url)
+
+    def is_valid_url(self, url):
+        parsed = urlparse(url)
+        return parsed.scheme in {"http", "https"} and parsed.netloc == self.base_netloc
+
+
+def benchmark_against_threads(pages=1000, latency=0.05):
+    """Pages/sec and TCP connections opened, thread-per-request crawler vs. asyncio crawler."""
+    from synthetic_site import crawl_site
+    from web_crawler_v1 import WebCrawler
+    runs = [
+        ("threads (v1, 5 workers)", lambda url: WebCrawler(url, max_workers=5), WebCrawler.crawl),
+        ("threads (v1, 50 workers)", lambda url: WebCrawler(url, max_workers=50), WebCrawler.crawl),
+        ("asyncio (500 in flight)", lambda url: AsyncWebCrawler(url, verbose=False),
+         lambda crawler: asyncio.run(crawler.crawl())),
+    ]
+    for label, make_crawler, crawl in runs:
+        site, _, elapsed = crawl_site(make_crawler, crawl, pages=pages, latency=latency)
+        print(f"{label:<26} {site.requests:>6} pages  {site.requests / elapsed:8.1f} pages/s  "
+              f"{site.connections:>6} connections")
+
+
+def test_worker_survives_errors(pages=200, workers=2):
+    """Unexpected per-URL errors are counted and logged; the workers keep crawling."""
+    import contextlib
+    import io
+    from synthetic_site import crawl_site
+
+    class FailingCrawler(AsyncWebCrawler):
+        async def fetch(self, session, url):
+            await super().fetch(session, url)
+            if url.endswith("0"):
+                raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        # With dead workers the queue would never drain
+        _, crawler, _ = crawl_site(lambda url: FailingCrawler(url, max_concurrency=workers, verbose=False),
+                                   lambda crawler: asyncio.run(asyncio.wait_for(crawler.crawl(), timeout=30)),
+                                   pages=pages)
+    assert len(crawler.visited) == pages and crawler.errors == pages // 10, crawler.errors
+    print("Worker error test passed")
+
+
+if __name__ == "__main__":
+    test_worker_survives_errors()
+    benchmark_against_threads()
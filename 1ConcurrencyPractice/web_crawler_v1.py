@@ -1,61 +1,624 @@
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
-from queue import Queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from html.parser import HTMLParser
+from queue import Queue, Empty
+from threading import BoundedSemaphore, Condition, Lock, Thread
+import hashlib
+import heapq
+import itertools
+import time
+
+from crawl_cache import CrawlCache, simhash
+from crawl_log import CrawlLog
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; each request spends one."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def delay(self, now):
+        """Seconds until a token is available, 0 if one is available now."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Host:
+    def __init__(self, name, bucket):
+        self.name = name
+        self.heap = []  # (-score, seq, url); entries whose score is outdated are skipped
+        self.in_flight = 0
+        self.bucket = bucket
+        self.waiting = False  # on the timer heap until its bucket refills
+
+
+class Frontier:
+    """
+    Per-host URL queues. get() dispatches the best-scoring URL among hosts that are below
+    `per_host_concurrency` fetches in flight and have a token in their `rate`/`burst`
+    bucket, so one slow or rate-limited host cannot tie up every worker. A URL's score is
+    its inlink count (times it was discovered) minus `depth_weight` per link from the seed;
+    rediscovering a queued URL raises its score. None disables a limit.
+    The frontier counts queued plus in-flight URLs, and get() returns None once that
+    reaches zero: the frontier is exhausted and no fetch can add to it any more.
+
+    get() does not scan the hosts: `ready` is a heap of (-score, seq, host) for the head
+    of every host below its concurrency limit, and `timers` a heap of (time, seq, host)
+    for hosts whose bucket is empty, which go back on `ready` once it has refilled. An
+    entry whose host has a different head by the time it is popped is dropped; whatever
+    changed the head pushed an entry for the new one.
+    """
+
+    def __init__(self, per_host_concurrency=None, rate=None, burst=1, depth_weight=1.0):
+        self.per_host_concurrency = per_host_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.depth_weight = depth_weight
+        self.hosts = {}
+        self.ready = []
+        self.timers = []
+        self.queued = {}  # url -> [depth, inlinks] until dispatched
+        self.pending = 0
+        self.seq = itertools.count()
+        self.cond = Condition()
+
+    def score(self, depth, inlinks):
+        return inlinks - self.depth_weight * depth
+
+    def add(self, url, depth=0, inlinks=1):
+        with self.cond:
+            entry = self.queued.get(url)
+            if entry is None:
+                entry = self.queued[url] = [depth, 0]
+                self.pending += 1
+            entry[0] = min(entry[0], depth)
+            entry[1] += inlinks
+            host = urlparse(url).netloc
+            state = self.hosts.get(host)
+            if state is None:
+                state = self.hosts[host] = _Host(host, TokenBucket(self.rate, self.burst) if self.rate else None)
+            item = (-self.score(*entry), next(self.seq), url)
+            heapq.heappush(state.heap, item)
+            if self._head(state) is item:
+                self._push_ready(state)
+            self.cond.notify_all()
+
+    def _push_ready(self, state):
+        """Lists the head of state's queue in `ready`, if the host can be dispatched from."""
+        if state.waiting or (self.per_host_concurrency and state.in_flight >= self.per_host_concurrency):
+            return
+        head = self._head(state)
+        if head is not None:
+            heapq.heappush(self.ready, (head[0], head[1], state.name))
+
+    def _head(self, state):
+        while state.heap:
+            neg_score, _, url = state.heap[0]
+            entry = self.queued.get(url)
+            if entry is not None and -neg_score == self.score(*entry):
+                return state.heap[0]
+            heapq.heappop(state.heap)
+        return None
+
+    def get(self):
+        """Next (url, depth) to fetch, blocking while every host is at its limits."""
+        with self.cond:
+            while True:
+                if self.pending == 0:
+                    return None
+                now = time.monotonic()
+                while self.timers and self.timers[0][0] <= now:
+                    state = self.hosts[heapq.heappop(self.timers)[2]]
+                    state.waiting = False
+                    self._push_ready(state)
+                while self.ready:
+                    _, seq, host = heapq.heappop(self.ready)
+                    state = self.hosts[host]
+                    head = self._head(state)
+                    if (head is None or head[1] != seq or state.waiting
+                            or (self.per_host_concurrency and state.in_flight >= self.per_host_concurrency)):
+                        continue  # outdated entry
+                    delay = state.bucket.delay(now) if state.bucket else 0.0
+                    if delay:
+                        state.waiting = True
+                        heapq.heappush(self.timers, (now + delay, next(self.seq), host))
+                        continue
+                    url = heapq.heappop(state.heap)[2]
+                    depth = self.queued.pop(url)[0]
+                    state.in_flight += 1
+                    if state.bucket:
+                        state.bucket.take()
+                    self._push_ready(state)
+                    return url, depth
+                # Woken by add()/done(), or when the earliest bucket refills
+                self.cond.wait(self.timers[0][0] - now if self.timers else None)
+
+    def done(self, url):
+        with self.cond:
+            state = self.hosts[urlparse(url).netloc]
+            state.in_flight -= 1
+            if self.per_host_concurrency and state.in_flight == self.per_host_concurrency - 1:
+                self._push_ready(state)  # was at its limit, so had no entry
+            self.pending -= 1
+            self.cond.notify_all()
+
+
+class _LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    # As URL parsers do: trim, and drop tabs and newlines inside
+                    value = value.strip().replace("\t", "").replace("\n", "").replace("\r", "")
+                    if value:
+                        self.hrefs.append(value)
+
+
+def extract_links(url, html):
+    """
+    Absolute URLs of the <a href> links in html (str or UTF-8 bytes). Streams the page
+    through html.parser callbacks without building a tree, several times faster than
+    BeautifulSoup(html, "html.parser").find_all("a").
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    parser = _LinkParser()
+    parser.feed(html)
+    parser.close()
+    return [urljoin(url, href) for href in parser.hrefs]
+
+
+def _parse_page(url, html, meta):
+    """
+    Outlinks of a fetched page, and its cache metadata with the simhash filled in if the
+    fetch did not need it: it is computed here, off the fetch threads when parsing is.
+    """
+    if meta is not None and meta["simhash"] is None:
+        meta = dict(meta, simhash=simhash(html))
+    return extract_links(url, html), meta
+
+
+def _extract_batch(pages):
+    return [_parse_page(url, html, meta) for url, html, meta in pages]
+
 
 class WebCrawler:
-    def __init__(self, base_url, max_workers=5):
+    """
+    Fetch threads only download pages. With `parser_processes`, link extraction runs in a
+    ProcessPoolExecutor, off the GIL the fetch threads need: downloaded pages are batched
+    (up to `parse_batch` pages, or whatever arrived within `parse_delay` seconds) and each
+    batch's links go back to the frontier when it is parsed. Without it, fetch threads
+    run extract_links themselves.
+    With a CrawlCache, fetches are conditional on the validators of the previous crawl,
+    and pages that are unchanged or near-duplicates of their previous version reuse its
+    outlinks without parsing.
+    With a `checkpoint` path, frontier and visited changes are appended to a CrawlLog,
+    and a crawler created on an existing log resumes that crawl.
+    """
+
+    def __init__(self, base_url, max_workers=5, frontier=None, seeds=(), visited=None,
+                 parser_processes=0, parse_batch=16, parse_delay=0.01, cache=None, checkpoint=None):
         self.base_url = base_url
-        self.visited = set()
+        self.netlocs = {urlparse(url).netloc for url in (base_url, *seeds)}
+        # Any container with `in`, add() and len(), e.g. a backend from visited_sets
+        self.visited = set() if visited is None else visited
         self.visited_lock = Lock()
-        self.queue = Queue()
-        self.queue.put(base_url)
+        self.frontier = frontier or Frontier()
+        self.log = None
+        self.resumed_in_flight = []
+        if checkpoint:
+            self.log = CrawlLog(checkpoint)
+            queued, self.resumed_in_flight = self.log.replay(self.visited)
+            for url, (depth, inlinks) in queued.items():
+                self.frontier.add(url, depth, inlinks)
+        for url in (base_url, *seeds):
+            if url not in self.visited:
+                self.enqueue(url, 0)
         self.max_workers = max_workers
+        self.parser_processes = parser_processes
+        self.parse_batch = parse_batch
+        self.parse_delay = parse_delay
+        self.parser_pool = None
+        self.cache = cache
+        self.parse_error = None  # first failure of the parse stage, raised by crawl()
+        # Bounded, so fetchers wait when parsing falls behind instead of buffering pages
+        self.pages = Queue(maxsize=2 * parse_batch * max(1, parser_processes))
+        self.parse_slots = BoundedSemaphore(2 * max(1, parser_processes))
 
     def crawl(self):
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-            for _ in range(self.max_workers):
-                futures.append(executor.submit(self.worker))
-            for f in futures:
-                f.result()  # Raises exceptions if any
+        batcher = None
+        if self.parser_processes:
+            self.parser_pool = ProcessPoolExecutor(max_workers=self.parser_processes)
+            batcher = Thread(target=self.batcher)
+            batcher.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = []
+                for _ in range(self.max_workers):
+                    futures.append(executor.submit(self.worker))
+                for f in futures:
+                    f.result()  # Raises exceptions if any
+        finally:
+            if batcher:
+                self.pages.put(None)
+                batcher.join()
+                self.parser_pool.shutdown()
+                self.parser_pool = None
+            if self.log:
+                self.log.close()
+        if self.parse_error:
+            raise self.parse_error
 
     def worker(self):
-        while not self.queue.empty():
-            url = self.queue.get()
+        # A page's links are added before done(), so get() returns None only when no URL
+        # is queued and no page is still being fetched or parsed that may add more.
+        while True:
+            item = self.frontier.get()
+            if item is None:
+                return
+            url, depth = item
+            if self.parse_error:
+                # Stop fetching; url stays queued in the log for a resumed crawl
+                self.frontier.done(url)
+                return
+            if not self.claim(url):
+                self.frontier.done(url)
+                continue
+            handed_off = processed = False
             try:
-                self.fetch(url)
+                page = self.fetch(url, depth)
+                if page is not None and self.parser_pool:
+                    self.pages.put((url, depth, *page))
+                    handed_off = True  # the parse stage calls done()
+                elif page is not None:
+                    links, meta = _parse_page(url, *page)
+                    self.page_parsed(url, depth, meta, links)
+                processed = True
             finally:
-                self.queue.task_done()
+                if not handed_off:
+                    self.finish(url, processed)
 
-    def fetch(self, url):
+    def enqueue(self, url, depth):
+        self.frontier.add(url, depth)
+        if self.log:
+            self.log.queued(url, depth)
+
+    def claim(self, url):
+        """Marks url visited; False if it already was."""
         with self.visited_lock:
             if url in self.visited:
-                return
+                return False
             self.visited.add(url)
             print(f"Crawling: {url}")
+        if self.log:
+            self.log.claimed(url)
+        return True
 
+    def finish(self, url, processed=True):
+        # Logged after the page's links, so a replay never loses them. A page that failed
+        # is not logged done: a resumed crawl fetches it again.
+        if self.log and processed:
+            self.log.done(url)
+        self.frontier.done(url)
+
+    def fetch(self, url, depth=0):
+        """
+        Downloads url. Returns (HTML bytes, cache metadata) for a page that needs parsing,
+        or None; a page the cache already has the outlinks for has them added here.
+        """
+        headers = self.cache.conditional_headers(url) if self.cache else {}
         try:
-            response = requests.get(url, timeout=5)
-            if "text/html" not in response.headers.get("Content-Type", ""):
-                return
-            soup = BeautifulSoup(response.text, "html.parser")
-            for link in soup.find_all("a", href=True):
-                full_url = urljoin(url, link["href"])
-                if self.is_valid_url(full_url):
-                    with self.visited_lock:
-                        if full_url not in self.visited:
-                            self.queue.put(full_url)
+            response = requests.get(url, timeout=5, headers=headers)
         except requests.RequestException:
-            pass
+            return None
+        if response.status_code == 304 and self.cache:
+            self.add_links(depth, self.cache.not_modified(url))
+            return None
+        if "text/html" not in response.headers.get("Content-Type", ""):
+            return None
+        html = response.content
+        if not self.cache:
+            return html, None
+
+        meta = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": hashlib.sha256(html).hexdigest(),
+        }
+        links, meta["simhash"] = self.cache.lookup(url, meta["content_hash"], html)
+        if links is None:
+            return html, meta
+        self.page_parsed(url, depth, meta, links)
+        return None
+
+    def page_parsed(self, url, depth, meta, links):
+        if self.cache:
+            self.cache.save(url, links, **meta)
+        self.add_links(depth, links)
+
+    def add_links(self, depth, links):
+        for full_url in links:
+            if self.is_valid_url(full_url):
+                with self.visited_lock:
+                    if full_url not in self.visited:
+                        self.enqueue(full_url, depth + 1)
+
+    def batcher(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                page = self.pages.get(timeout=timeout)
+            except Empty:
+                page = False
+            if page:
+                batch.append(page)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.parse_delay
+            if batch and (page is None or len(batch) >= self.parse_batch or time.monotonic() >= deadline):
+                self.parse_slots.acquire()
+                try:
+                    future = self.parser_pool.submit(_extract_batch, [(url, html, meta) for url, _, html, meta in batch])
+                except Exception as e:  # e.g. BrokenProcessPool
+                    self.parse_failed(batch, e)
+                else:
+                    future.add_done_callback(lambda f, batch=batch: self.parsed(batch, f))
+                batch = []
+            if page is None:
+                return
+
+    def parsed(self, batch, future):
+        done = 0
+        try:
+            for (url, depth, _, _), (links, meta) in zip(batch, future.result()):
+                self.page_parsed(url, depth, meta, links)
+                done += 1
+        except Exception as e:
+            self.parse_failed(batch[done:], e)
+        else:
+            self.parse_slots.release()
+        finally:
+            for url, _, _, _ in batch[:done]:
+                self.finish(url)
+
+    def parse_failed(self, batch, error):
+        """Records the error for crawl() to raise, and releases the batch's pages unparsed."""
+        self.parse_error = self.parse_error or error
+        self.parse_slots.release()
+        for url, _, _, _ in batch:
+            self.finish(url, processed=False)
 
     def is_valid_url(self, url):
         parsed = urlparse(url)
-        return parsed.scheme in {"http", "https"} and parsed.netloc == urlparse(self.base_url).netloc
+        return parsed.scheme in {"http", "https"} and parsed.netloc in self.netlocs
+
+def test_full_coverage(pages=500, latency=0.02):
+    """Every page of the synthetic site must be crawled, whatever the worker count."""
+    from synthetic_site import crawl_site
+    for workers in (1, 5, 20):
+        _, crawler, elapsed = crawl_site(lambda url: WebCrawler(url, max_workers=workers),
+                                         pages=pages, latency=latency)
+        assert len(crawler.visited) == pages, f"{workers} workers crawled {len(crawler.visited)}/{pages} pages"
+        print(f"{workers:>2} workers: {len(crawler.visited)}/{pages} pages  {pages / elapsed:7.1f} pages/s")
+
+def test_frontier_priority():
+    """Shallow and often-linked URLs are dispatched first."""
+    frontier = Frontier()
+    frontier.add("http://a/deep", depth=2)
+    frontier.add("http://a/shallow", depth=1)
+    for _ in range(3):
+        frontier.add("http://a/popular", depth=2)
+    order = []
+    while (item := frontier.get()) is not None:
+        order.append(item[0])
+        frontier.done(item[0])
+    assert order == ["http://a/popular", "http://a/shallow", "http://a/deep"], order
+
+def benchmark_frontier(hosts=10_000, urls_per_host=3):
+    """get()/done() pairs per second with `hosts` hosts queued, unlimited and polite."""
+    for label, frontier in (
+        ("unlimited", Frontier()),
+        ("polite", Frontier(per_host_concurrency=2, rate=1000, burst=4)),
+    ):
+        for i in range(urls_per_host):
+            for h in range(hosts):
+                frontier.add(f"http://host{h}/page/{i}", depth=i)
+        start = time.perf_counter()
+        count = 0
+        while (item := frontier.get()) is not None:
+            frontier.done(item[0])
+            count += 1
+        assert count == hosts * urls_per_host
+        print(f"{label:<9} {hosts} hosts  {count / (time.perf_counter() - start):10.0f} get/done per s")
+
+def test_politeness(pages=150, concurrency=2, rate=40, burst=4):
+    """
+    Crawl three hosts, one slow, with 12 workers, unlimited and then with per-host limits.
+    The limited crawl must stay within `concurrency` and `rate` on every host while still
+    crawling them all in parallel.
+    """
+    from synthetic_site import SyntheticSite, quiet_crawl
+    for label, frontier in (
+        ("unlimited", lambda: Frontier()),
+        ("polite", lambda: Frontier(per_host_concurrency=concurrency, rate=rate, burst=burst)),
+    ):
+        sites = [SyntheticSite(pages=pages, latency=latency, seed=i) for i, latency in enumerate((0.1, 0.01, 0.01))]
+        for site in sites:
+            site.start()
+        try:
+            seeds = [site.base_url for site in sites]
+            crawler = WebCrawler(seeds[0], max_workers=12, frontier=frontier(), seeds=seeds[1:])
+            elapsed = quiet_crawl(crawler.crawl)
+        finally:
+            for site in sites:
+                site.stop()
+        assert len(crawler.visited) == pages * len(sites)
+        print(f"{label:<9} {len(crawler.visited) / elapsed:7.1f} pages/s  "
+              f"max in flight per host {[site.max_active for site in sites]}  "
+              f"peak req/s per host {[site.peak_rate() for site in sites]}")
+        if label == "polite":
+            for site in sites:
+                assert site.max_active <= concurrency
+                assert site.peak_rate() <= rate + burst
+
+def benchmark_parser_processes(pages=600, filler=300, workers=16):
+    """
+    Pages/sec crawling a local site of parse-heavy pages, link extraction in the fetch
+    threads (0) or in 1, 4 and 8 parser processes; preceded by parse-only throughput
+    of BeautifulSoup vs. extract_links on the same pages.
+    """
+    from synthetic_site import SyntheticSite, crawl_site
+    corpus_site = SyntheticSite(pages=200, filler=filler)
+    corpus = [(f"http://127.0.0.1/page/{n}", corpus_site.render(n)) for n in range(200)]
+    for label, parse in (
+        ("BeautifulSoup", lambda url, html: [urljoin(url, a["href"]) for a in BeautifulSoup(html, "html.parser").find_all("a", href=True)]),
+        ("extract_links", extract_links),
+    ):
+        start = time.perf_counter()
+        for url, html in corpus:
+            parse(url, html)
+        print(f"parse only, {label:<14} {len(corpus) / (time.perf_counter() - start):8.1f} pages/s")
+
+    for processes in (0, 1, 4, 8):
+        _, crawler, elapsed = crawl_site(
+            lambda url: WebCrawler(url, max_workers=workers, parser_processes=processes),
+            pages=pages, filler=filler)
+        assert len(crawler.visited) == pages
+        print(f"crawl, {processes} parser processes {pages / elapsed:8.1f} pages/s")
+
+def test_recrawl_with_cache(pages=300):
+    """
+    Crawl a site, then re-crawl it with the same CrawlCache: as-is (all 304s), after
+    edits (a near-duplicate edit is not parsed, a real one is), and with the server no
+    longer sending validators (bodies are downloaded but matched by content hash).
+    """
+    import os
+    import tempfile
+    from synthetic_site import SyntheticSite, quiet_crawl
+    unique = " ".join(f"term{i}" for i in range(200))
+    expected = {
+        "re-crawl": {"not_modified": pages},
+        "after edits": {"not_modified": pages - 2, "near_duplicate": 1, "parsed": 1},
+        "no ETags": {"unchanged": pages},
+    }
+    with tempfile.TemporaryDirectory() as tmp, SyntheticSite(pages=pages) as site:
+        cache = CrawlCache(os.path.join(tmp, "cache.db"))
+        site.edit(5, unique)
+        for label, before in (
+            ("first crawl", None),
+            ("re-crawl", None),
+            ("after edits", lambda: (site.edit(5, unique + " updated"),
+                                     site.edit(7, " ".join(f"fresh{i}" for i in range(40))))),
+            ("no ETags", lambda: setattr(site, "validators", False)),
+        ):
+            if before:
+                before()
+            cache.stats.clear()
+            sent, requests_before = site.bytes_sent, site.requests
+            # The first crawl's simhashes come from parser processes, the later ones' from fetch threads
+            crawler = WebCrawler(site.base_url, max_workers=8, cache=cache,
+                                 parser_processes=2 if label == "first crawl" else 0)
+            elapsed = quiet_crawl(crawler.crawl)
+            assert len(crawler.visited) == pages and site.requests - requests_before == pages
+            print(f"{label:<12} {site.bytes_sent - sent:>8} bytes  {elapsed:5.2f}s  {dict(cache.stats)}")
+            assert label not in expected or cache.stats == expected[label], cache.stats
+        cache.close()
+
+def test_resume_after_crash(pages=400, workers=8):
+    """
+    Kill a checkpointed crawl halfway, resume it from its log: the whole site must end up
+    crawled, re-fetching at most the pages that were in flight at the kill.
+    """
+    import os
+    import subprocess
+    import sys
+    import tempfile
+    from synthetic_site import SyntheticSite, quiet_crawl
+    child_code = ("import sys; from web_crawler_v1 import WebCrawler; "
+                  f"WebCrawler(sys.argv[1], max_workers={workers}, checkpoint=sys.argv[2]).crawl()")
+    with tempfile.TemporaryDirectory() as tmp, SyntheticSite(pages=pages, latency=0.02) as site:
+        path = os.path.join(tmp, "crawl.log")
+        child = subprocess.Popen([sys.executable, "-c", child_code, site.base_url, path],
+                                 cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+        while site.requests < pages // 2:
+            assert child.poll() is None, "crawl ended before it could be killed"
+            time.sleep(0.01)
+        child.kill()
+        child.wait()
+        killed_at = site.requests
+
+        start = time.perf_counter()
+        crawler = WebCrawler(site.base_url, max_workers=workers, checkpoint=path)
+        reload = time.perf_counter() - start
+        print(f"killed after {killed_at} requests; resumed in {reload * 1000:.1f} ms with "
+              f"{len(crawler.visited)} visited, {len(crawler.frontier.queued)} queued, "
+              f"{len(crawler.resumed_in_flight)} in flight")
+        quiet_crawl(crawler.crawl)
+        refetched = site.requests - pages
+        print(f"finished with {len(crawler.visited)}/{pages} pages, {refetched} fetched twice")
+        assert len(crawler.visited) == pages
+        assert refetched <= len(crawler.resumed_in_flight) <= workers
+
+        # A finished crawl resumes to an empty frontier
+        crawler = WebCrawler(site.base_url, max_workers=workers, checkpoint=path)
+        quiet_crawl(crawler.crawl)
+        assert len(crawler.visited) == pages and site.requests == pages + refetched
+
+def test_parse_failure(pages=200, failing="/page/7"):
+    """
+    A parse-stage error fails crawl() instead of being logged and dropped, and the page
+    is not recorded done, so resuming from the checkpoint crawls it and the rest.
+    """
+    class FailingCrawler(WebCrawler):
+        def page_parsed(self, url, depth, meta, links):
+            if url.endswith(failing):
+                raise ValueError("parser error")
+            super().page_parsed(url, depth, meta, links)
+
+    import os
+    import tempfile
+    from synthetic_site import SyntheticSite, quiet_crawl
+    with tempfile.TemporaryDirectory() as tmp, SyntheticSite(pages=pages) as site:
+        path = os.path.join(tmp, "crawl.log")
+        crawler = FailingCrawler(site.base_url, max_workers=4, parser_processes=1, checkpoint=path)
+        try:
+            quiet_crawl(crawler.crawl)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("crawl() swallowed the parse error")
+        with open(path, encoding="utf-8") as log:
+            assert not any(line.startswith("D") and line.rstrip().endswith(failing) for line in log)
+
+        crawler = WebCrawler(site.base_url, max_workers=4, parser_processes=1, checkpoint=path)
+        quiet_crawl(crawler.crawl)
+        assert len(crawler.visited) == pages
+    print("Parse failure test passed")
 
 if __name__ == "__main__":
+    test_frontier_priority()
+    benchmark_frontier()
+    test_full_coverage()
+    test_politeness()
+    benchmark_parser_processes()
+    test_recrawl_with_cache()
+    test_resume_after_crash()
+    test_parse_failure()
+
     seed_url = "https://example.com"
     crawler = WebCrawler(seed_url, max_workers=5)
     crawler.crawl()
@@ -19,12 +19,22 @@ class WebCrawler:
             t = threading.Thread(target=self.worker)
             t.start()
             threads.append(t)
+        # fetch() enqueues a page's links before its task_done(), so join() returns only
+        # when every queued URL is processed and none is in flight; then stop the workers
+        self.queue.join()
+        for _ in range(self.max_threads):
+            self.queue.put(None)
         for t in threads:
             t.join()
 
     def worker(self):
-        while not self.queue.empty():
+        # Block on get() rather than polling empty(): an empty queue only means the frontier
+        # is exhausted once no other worker is still fetching a page that may enqueue links.
+        while True:
             url = self.queue.get()
+            if url is None:
+                self.queue.task_done()
+                return
             try:
                 self.fetch(url)
             finally:
@@ -55,7 +65,18 @@ class WebCrawler:
         parsed = urlparse(url)
         return parsed.scheme in {"http", "https"} and parsed.netloc == urlparse(self.base_url).netloc
 
+def test_full_coverage(pages=500, latency=0.02):
+    """Every page of the synthetic site must be crawled, whatever the thread count."""
+    from synthetic_site import crawl_site
+    for threads in (1, 5, 20):
+        _, crawler, elapsed = crawl_site(lambda url: WebCrawler(url, max_threads=threads),
+                                         pages=pages, latency=latency)
+        assert len(crawler.visited) == pages, f"{threads} threads crawled {len(crawler.visited)}/{pages} pages"
+        print(f"{threads:>2} threads: {len(crawler.visited)}/{pages} pages  {pages / elapsed:7.1f} pages/s")
+
 if __name__ == "__main__":
+    test_full_coverage()
+
     seed_url = "https://example.com"
     crawler = WebCrawler(seed_url, max_threads=5)
     crawler.crawl()